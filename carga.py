@@ -0,0 +1,163 @@
+# carga.py
+"""
+Gerador de carga para o servidor: abre muitas conexões de bots (asyncio) que jogam partidas
+de verdade com MOVE/CHAT e mede a latência de conexão, o tempo de ida e volta de cada
+MOVE até o UPDATE correspondente e os erros.
+
+Uso (contra o servidor de salas): python servidor.py --salas
+                                  python carga.py --bots 500 --partidas 2
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+from cliente import EstadoCliente, mensagem_move
+from protocolo import Decodificador, codificar, codificar_lote
+
+HOST = '127.0.0.1'
+PORT = 65432
+
+
+class Medicoes:
+    def __init__(self):
+        self.conexao_ms = []
+        self.ida_e_volta_ms = []
+        self.erros = Counter()
+        self.partidas = 0
+        self.lances = 0
+
+
+def percentis(valores, pontos=(50, 90, 99)):
+    if not valores:
+        return {}
+    ordenados = sorted(valores)
+    resultado = {f"p{p}": ordenados[min(len(ordenados) - 1, len(ordenados) * p // 100)] for p in pontos}
+    resultado["max"] = ordenados[-1]
+    return resultado
+
+
+def escolher_movimento(estado, rng):
+    """Um lance que avança na direção da meta quando possível (para as partidas terminarem)."""
+    sentido = 1 if estado.jogador_id == 1 else -1
+    melhores = []
+    melhor_ganho = None
+    for r, c in estado.minhas_pecas():
+        for to_r, to_c in estado.calculate_possible_moves(r, c):
+            ganho = ((to_r - r) + (to_c - c)) * sentido
+            if melhor_ganho is None or ganho > melhor_ganho:
+                melhor_ganho = ganho
+                melhores = [((r, c), (to_r, to_c))]
+            elif ganho == melhor_ganho:
+                melhores.append(((r, c), (to_r, to_c)))
+    return rng.choice(melhores) if melhores else None
+
+
+async def jogar_uma(bot_id, args, medicoes, rng):
+    """Uma conexão, uma partida. Devolve quando a partida termina ou a conexão cai."""
+    inicio = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(args.host, args.port), args.timeout)
+    except (OSError, asyncio.TimeoutError):
+        medicoes.erros["conexao"] += 1
+        return
+    medicoes.conexao_ms.append((time.perf_counter() - inicio) * 1000)
+
+    estado = EstadoCliente()
+    decodificador = Decodificador()
+    pendente = None  # (UPDATE esperado, instante do envio)
+    meus_lances = 0
+    try:
+        while estado.vencedor is None:
+            data = await asyncio.wait_for(reader.read(4096), args.timeout)
+            if not data:
+                medicoes.erros["fechada_pelo_servidor"] += 1
+                return
+            for message in decodificador.alimentar(data):
+                command, parts = estado.processar(message)
+
+                if command == "UPDATE" and pendente and message == pendente[0]:
+                    medicoes.ida_e_volta_ms.append((time.perf_counter() - pendente[1]) * 1000)
+                    pendente = None
+                elif command == "SYNC":
+                    # O servidor nos pôs em dia com uma foto; o UPDATE esperado pode ter ido junto
+                    pendente = None
+                elif command == "ERRO":
+                    medicoes.erros["erro_do_servidor"] += 1
+                    pendente = None
+                elif command == "OPONENTE_DESCONECTOU":
+                    medicoes.erros["oponente_desconectou"] += 1
+                    return
+                elif command == "VENCEDOR":
+                    medicoes.partidas += 1
+
+            if estado.is_my_turn and pendente is None and estado.vencedor is None:
+                if args.pensar_ms:
+                    await asyncio.sleep(rng.uniform(0, args.pensar_ms) / 1000)
+                movimento = escolher_movimento(estado, rng) if meus_lances < args.max_lances else None
+                if movimento is None:
+                    writer.write(codificar("DESISTENCIA"))
+                    estado.is_my_turn = False
+                    continue
+                lote = [mensagem_move(*movimento)]
+                if rng.random() < args.chat:
+                    lote.append(f"CHAT:bot {bot_id} diz oi")
+                update = "UPDATE:" + lote[0][len("MOVE:"):]
+                pendente = (update, time.perf_counter())
+                writer.write(codificar_lote(lote))
+                meus_lances += 1
+                medicoes.lances += 1
+                await writer.drain()
+    except asyncio.TimeoutError:
+        medicoes.erros["timeout"] += 1
+    except (ConnectionError, ValueError):
+        medicoes.erros["conexao_perdida"] += 1
+    finally:
+        writer.close()
+
+
+async def bot(bot_id, args, medicoes):
+    rng = random.Random(args.semente + bot_id)
+    # Espalha as conexões pela rampa, para não abrir todas no mesmo instante
+    await asyncio.sleep(rng.uniform(0, args.rampa_s))
+    for _ in range(args.partidas):
+        await jogar_uma(bot_id, args, medicoes, rng)
+
+
+async def executar(args):
+    medicoes = Medicoes()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(bot(i, args, medicoes) for i in range(args.bots)))
+    return medicoes, time.perf_counter() - inicio
+
+
+def relatorio(medicoes, segundos):
+    print(f"Duração: {segundos:.1f}s")
+    print(f"Partidas terminadas: {medicoes.partidas}  Lances enviados: {medicoes.lances} "
+          f"({medicoes.lances / segundos:.0f}/s)")
+    for nome, valores in (("Conexão", medicoes.conexao_ms), ("MOVE -> UPDATE", medicoes.ida_e_volta_ms)):
+        p = percentis(valores)
+        if p:
+            print(f"{nome} (ms, n={len(valores)}): " + "  ".join(f"{k}={v:.2f}" for k, v in p.items()))
+    if medicoes.erros:
+        print("Erros: " + ", ".join(f"{k}={v}" for k, v in sorted(medicoes.erros.items())))
+    else:
+        print("Erros: nenhum")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerador de carga com bots para o servidor de Halma.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--bots", type=int, default=100, help="conexões simultâneas")
+    parser.add_argument("--partidas", type=int, default=1, help="partidas por bot, uma depois da outra")
+    parser.add_argument("--rampa-s", type=float, default=1.0, help="tempo para abrir todas as conexões")
+    parser.add_argument("--pensar-ms", type=float, default=0.0, help="espera máxima antes de cada lance")
+    parser.add_argument("--max-lances", type=int, default=200, help="o bot desiste depois disso")
+    parser.add_argument("--chat", type=float, default=0.05, help="chance de mandar um CHAT junto do lance")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    medicoes, segundos = asyncio.run(executar(args))
+    relatorio(medicoes, segundos)
@@ -0,0 +1,140 @@
+# cliente.py
+"""
+Lado do jogador sem interface gráfica: o espelho do tabuleiro, de quem é a vez e o
+tratamento das mensagens do servidor. Não faz I/O nenhum, então serve tanto para a janela
+Tk (jogador.py) quanto para os bots do gerador de carga (carga.py).
+
+Os destinos de cada peça ficam em cache. Cada entrada guarda as casas que a busca
+consultou, então um UPDATE só descarta as peças cuja resposta podia mudar. O
+`precalcular` pode rodar numa thread à parte quando chega a vez do jogador.
+"""
+import threading
+from protocolo import ler_sync
+from tabuleiro import alcance_rastreado, geometria, indices
+
+BOARD_SIZE = 10
+P1_INITIAL_POSITIONS = [
+    (0, 0), (1, 0), (2, 0), (3, 0), (0, 1), (1, 1), (2, 1), (0, 2), (1, 2), (0, 3)
+]
+P2_INITIAL_POSITIONS = [
+    (BOARD_SIZE - 1 - r, BOARD_SIZE - 1 - c) for r, c in P1_INITIAL_POSITIONS
+]
+
+
+def mensagem_move(from_pos, to_pos):
+    return f"MOVE:{from_pos[0]},{from_pos[1]}:{to_pos[0]},{to_pos[1]}"
+
+
+class EstadoCliente:
+    def __init__(self):
+        self.board = [[0] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.jogador_id = 0
+        self.token = None
+        self.is_my_turn = False
+        self.vencedor = None
+        self.dica = None  # último lance sugerido pelo servidor (from_pos, to_pos)
+        self.geo = geometria(BOARD_SIZE)
+        self.ocupadas = 0  # bitboard de todas as peças, espelho de `board`
+        # (r, c) -> (destinos, casas consultadas); vale enquanto nenhuma dessas casas mudar
+        self.alcances = {}
+        self.geracao = 0  # muda a cada alteração no tabuleiro
+        self._trava = threading.Lock()
+        self.dispor_pecas()
+
+    def dispor_pecas(self):
+        for r, c in P1_INITIAL_POSITIONS: self.board[r][c] = 1
+        for r, c in P2_INITIAL_POSITIONS: self.board[r][c] = 2
+        with self._trava:
+            self.ocupadas = sum(1 << (r * BOARD_SIZE + c) for r, c in P1_INITIAL_POSITIONS + P2_INITIAL_POSITIONS)
+            self.alcances.clear()
+            self.geracao += 1
+
+    def processar(self, message):
+        """
+        Atualiza o estado com uma mensagem do servidor e devolve (command, parts),
+        para quem estiver em volta (interface ou bot) reagir.
+        """
+        parts = message.split(':')
+        command = parts[0]
+
+        if command == "BEMVINDO":
+            self.jogador_id = int(parts[1])
+            # Token da sessão: com ele dá para voltar ao mesmo assento (RETOMAR) se a conexão cair
+            self.token = parts[2] if len(parts) > 2 else None
+        elif command == "ESPECTADOR":
+            self.jogador_id = 0  # só assiste
+        elif command == "SYNC":
+            self.carregar_foto(*ler_sync(parts))
+        elif command == "SEU_TURNO":
+            self.is_my_turn = True
+        elif command == "UPDATE":
+            from_pos = tuple(map(int, parts[1].split(',')))
+            to_pos = tuple(map(int, parts[2].split(',')))
+            self.update_board(from_pos, to_pos)
+            self.is_my_turn = False
+            self.dica = None
+        elif command == "VENCEDOR":
+            self.vencedor = int(parts[1])
+            self.is_my_turn = False
+        elif command == "OPONENTE_DESCONECTOU":
+            self.is_my_turn = False
+        elif command == "DICA":
+            self.dica = (tuple(map(int, parts[1].split(','))), tuple(map(int, parts[2].split(','))))
+        return command, parts
+
+    def carregar_foto(self, pecas1, pecas2, vez, lance, vencedor):
+        """Substitui o tabuleiro inteiro pela foto enviada pelo servidor."""
+        for r in range(BOARD_SIZE):
+            for c in range(BOARD_SIZE):
+                bit = 1 << (r * BOARD_SIZE + c)
+                self.board[r][c] = 1 if pecas1 & bit else 2 if pecas2 & bit else 0
+        with self._trava:
+            self.ocupadas = pecas1 | pecas2
+            self.alcances.clear()
+            self.geracao += 1
+        self.vencedor = vencedor
+        self.is_my_turn = vencedor is None and vez == self.jogador_id
+
+    def update_board(self, from_pos, to_pos):
+        player = self.board[from_pos[0]][from_pos[1]]
+        self.board[to_pos[0]][to_pos[1]] = player
+        self.board[from_pos[0]][from_pos[1]] = 0
+        mudou = (1 << (from_pos[0] * BOARD_SIZE + from_pos[1])) | (1 << (to_pos[0] * BOARD_SIZE + to_pos[1]))
+        with self._trava:
+            self.ocupadas ^= mudou
+            self.geracao += 1
+            # Só saem do cache a peça que andou e as que consultaram uma das duas casas
+            for pos in [pos for pos, (_, consultadas) in self.alcances.items()
+                        if consultadas & mudou or pos == from_pos or pos == to_pos]:
+                del self.alcances[pos]
+
+    def minhas_pecas(self):
+        return [(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)
+                if self.board[r][c] == self.jogador_id]
+
+    def _calcular(self, ocupadas, pos):
+        origem = pos[0] * BOARD_SIZE + pos[1]
+        destinos, consultadas = alcance_rastreado(self.geo, ocupadas & ~(1 << origem), origem)
+        posicoes = self.geo.posicoes
+        return [posicoes[i] for i in indices(destinos)], consultadas
+
+    def precalcular(self):
+        """Calcula os destinos de todas as peças do jogador que ainda não estão no cache."""
+        with self._trava:
+            geracao = self.geracao
+            ocupadas = self.ocupadas
+            faltam = [pos for pos in self.minhas_pecas() if pos not in self.alcances]
+        for pos in faltam:
+            resultado = self._calcular(ocupadas, pos)
+            with self._trava:
+                if self.geracao != geracao:
+                    return  # o tabuleiro mudou no meio do caminho; o próximo turno recalcula
+                self.alcances[pos] = resultado
+
+    def calculate_possible_moves(self, r, c):
+        """Destinos da peça em (r, c); normalmente já estão no cache."""
+        with self._trava:
+            entrada = self.alcances.get((r, c))
+            if entrada is None:
+                entrada = self.alcances[(r, c)] = self._calcular(self.ocupadas, (r, c))
+        return list(entrada[0])
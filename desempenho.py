@@ -0,0 +1,356 @@
+# desempenho.py
+"""
+Benchmarks dos caminhos quentes, com resultados em JSON e comparação entre duas execuções.
+
+Grupos:
+  regras     is_valid_move, is_legal_move, move_piece e check_win_condition em posições
+             roteirizadas (partidas aleatórias com semente fixa)
+  cliente    calculate_possible_moves em tabuleiros cheios de meio de jogo, sem e com cache
+  protocolo  codificação e decodificação de quadros
+  servidor   ida e volta MOVE -> UPDATE contra um servidor.py local, com bots sem interface
+
+Cada medida de vazão é a melhor de algumas repetições (menos ruído do sistema); as de
+latência são percentis de todas as amostras.
+
+Uso: python desempenho.py rodar --saida base.json
+     python desempenho.py rodar --saida novo.json
+     python desempenho.py comparar base.json novo.json --limite 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from cliente import EstadoCliente
+from protocolo import Decodificador, codificar
+from tabuleiro import HalmaGame
+
+GRUPOS = ("regras", "cliente", "protocolo", "servidor")
+VERSAO = 1
+TEMPO_MINIMO_S = 0.2  # cada repetição roda lotes até passar disso, para o relógio não pesar
+
+
+def posicoes_roteiro(quantidade, semente=0, min_lances=20, max_lances=80):
+    """Posições de meio de jogo, sempre as mesmas para a mesma semente."""
+    rng = random.Random(semente)
+    posicoes = []
+    while len(posicoes) < quantidade:
+        jogo = HalmaGame()
+        alvo = rng.randint(min_lances, max_lances)
+        for _ in range(alvo):
+            movimentos = jogo.generate_moves(jogo.current_turn)
+            if jogo.winner or not movimentos:
+                break
+            jogo.move_piece(jogo.current_turn, *rng.choice(movimentos))
+        if not jogo.winner:
+            posicoes.append(jogo)
+    return posicoes
+
+
+def melhor_vazao(rodada, repeticoes):
+    """`rodada()` faz um lote de operações e devolve quantas fez; devolve o melhor ops/s."""
+    melhor = 0.0
+    for _ in range(repeticoes):
+        operacoes = 0
+        inicio = time.perf_counter()
+        while True:
+            operacoes += rodada()
+            decorrido = time.perf_counter() - inicio
+            if decorrido >= TEMPO_MINIMO_S:
+                break
+        melhor = max(melhor, operacoes / decorrido)
+    return melhor
+
+
+def vazao(valor):
+    return {"valor": valor, "unidade": "op/s", "maior_melhor": True}
+
+
+def latencia(valor):
+    return {"valor": valor, "unidade": "ms", "maior_melhor": False}
+
+
+def medir_regras(tamanho, repeticoes):
+    posicoes = posicoes_roteiro(tamanho)
+    rng = random.Random(1)
+    # Para cada posição: os lances legais e alguns pares quaisquer (a maioria inválidos)
+    consultas = []
+    for jogo in posicoes:
+        player = jogo.current_turn
+        movimentos = jogo.generate_moves(player)
+        for from_pos, to_pos in movimentos:
+            consultas.append((jogo, player, from_pos, to_pos))
+        for _ in range(len(movimentos)):
+            consultas.append((jogo, player, (rng.randrange(10), rng.randrange(10)),
+                              (rng.randrange(10), rng.randrange(10))))
+
+    def validar():
+        for jogo, player, from_pos, to_pos in consultas:
+            jogo.is_valid_move(player, from_pos, to_pos, [])
+        return len(consultas)
+
+    def legal():
+        for jogo, player, from_pos, to_pos in consultas:
+            jogo.is_legal_move(player, from_pos, to_pos)
+        return len(consultas)
+
+    lances = [(jogo, jogo.current_turn, movimento)
+              for jogo in posicoes for movimento in jogo.generate_moves(jogo.current_turn)]
+    melhor_mover = 0.0
+    for _ in range(repeticoes):
+        # move_piece altera o jogo: as cópias são feitas fora do tempo medido
+        operacoes = 0
+        decorrido = 0.0
+        while decorrido < TEMPO_MINIMO_S:
+            copias = [(jogo.clone(), player, movimento) for jogo, player, movimento in lances]
+            inicio = time.perf_counter()
+            for copia, player, (from_pos, to_pos) in copias:
+                copia.move_piece(player, from_pos, to_pos)
+            decorrido += time.perf_counter() - inicio
+            operacoes += len(copias)
+        melhor_mover = max(melhor_mover, operacoes / decorrido)
+
+    def vitoria():
+        for _ in range(10):
+            for jogo in posicoes:
+                jogo.check_win_condition()
+        return 10 * len(posicoes)
+
+    return {
+        "regras.is_valid_move": vazao(melhor_vazao(validar, repeticoes)),
+        "regras.is_legal_move": vazao(melhor_vazao(legal, repeticoes)),
+        "regras.move_piece": vazao(melhor_mover),
+        "regras.check_win_condition": vazao(melhor_vazao(vitoria, repeticoes)),
+    }
+
+
+def medir_cliente(tamanho, repeticoes):
+    # Meio de jogo: os dois exércitos se cruzando no centro, que é onde há mais saltos
+    estados = []
+    for jogo in posicoes_roteiro(tamanho, semente=2, min_lances=40, max_lances=70):
+        estado = EstadoCliente()
+        estado.carregar_foto(jogo.pecas[1], jogo.pecas[2], jogo.current_turn, jogo.move_number, None)
+        estado.jogador_id = jogo.current_turn
+        estados.append((estado, estado.minhas_pecas()))
+
+    def sem_cache():
+        total = 0
+        for estado, pecas in estados:
+            for r, c in pecas:
+                estado.alcances.clear()
+                estado.calculate_possible_moves(r, c)
+            total += len(pecas)
+        return total
+
+    def com_cache():
+        total = 0
+        for estado, pecas in estados:
+            for r, c in pecas:
+                estado.calculate_possible_moves(r, c)
+            total += len(pecas)
+        return total
+
+    def precalcular():
+        for estado, _ in estados:
+            estado.alcances.clear()
+            estado.precalcular()
+        return len(estados)
+
+    return {
+        "cliente.calculate_possible_moves": vazao(melhor_vazao(sem_cache, repeticoes)),
+        "cliente.calculate_possible_moves_cache": vazao(melhor_vazao(com_cache, repeticoes)),
+        "cliente.precalcular_turno": vazao(melhor_vazao(precalcular, repeticoes)),
+    }
+
+
+def medir_protocolo(tamanho, repeticoes):
+    rng = random.Random(3)
+    mensagens = [f"UPDATE:{rng.randrange(10)},{rng.randrange(10)}:{rng.randrange(10)},{rng.randrange(10)}"
+                 for _ in range(tamanho)]
+    mensagens += ["SEU_TURNO", "CHAT:1:boa jogada", "SYNC:10000301c0f:f0380c0200000000000000000:2:1:0"]
+    fluxo = b"".join(codificar(message) for message in mensagens)
+    pedacos = [fluxo[i:i + 4096] for i in range(0, len(fluxo), 4096)]
+
+    def codificacao():
+        for message in mensagens:
+            codificar(message)
+        return len(mensagens)
+
+    def decodificacao():
+        decodificador = Decodificador()
+        total = 0
+        for pedaco in pedacos:
+            total += len(decodificador.alimentar(pedaco))
+        return total
+
+    return {
+        "protocolo.codificar": vazao(melhor_vazao(codificacao, repeticoes)),
+        "protocolo.decodificar": vazao(melhor_vazao(decodificacao, repeticoes)),
+    }
+
+
+def porta_livre():
+    """Uma porta livre cuja seguinte (a de retorno/espectadores) também está livre."""
+    while True:
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            porta = s.getsockname()[1]
+        try:
+            with socket.socket() as s:
+                s.bind(('127.0.0.1', porta + 1))
+            return porta
+        except OSError:
+            continue
+
+
+def subir_servidor(porta, *extra):
+    processo = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "servidor.py"),
+         "--porta", str(porta), "--metricas-porta", "0", "--log", "WARNING", *extra],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # A porta seguinte é aberta depois da principal; conectar nela não ocupa assento
+    prazo = time.perf_counter() + 10
+    while time.perf_counter() < prazo:
+        try:
+            socket.create_connection(('127.0.0.1', porta + 1), timeout=0.5).close()
+            return processo
+        except OSError:
+            time.sleep(0.05)
+    processo.kill()
+    raise RuntimeError("O servidor não subiu a tempo.")
+
+
+def bots(porta, quantidade, semente):
+    import carga
+    args = argparse.Namespace(host='127.0.0.1', port=porta, bots=quantidade, partidas=1, rampa_s=0.0,
+                              pensar_ms=0.0, max_lances=200, chat=0.0, timeout=30.0, semente=semente)
+    medicoes, _ = asyncio.run(carga.executar(args))
+    return medicoes
+
+
+def medir_servidor(tamanho, repeticoes):
+    import carga
+    amostras = []
+    erros = 0
+    # servidor.py com threads: uma partida por processo
+    for rodada in range(repeticoes):
+        porta = porta_livre()
+        processo = subir_servidor(porta)
+        try:
+            medicoes = bots(porta, 2, semente=rodada)
+        finally:
+            processo.kill()
+            processo.wait()
+        amostras += medicoes.ida_e_volta_ms
+        erros += sum(medicoes.erros.values())
+    resultado = {}
+    for nome, valor in carga.percentis(amostras).items():
+        if nome != "max":
+            resultado[f"servidor.move_update_{nome}"] = latencia(valor)
+
+    # Servidor de salas com várias partidas ao mesmo tempo
+    porta = porta_livre()
+    processo = subir_servidor(porta, "--salas")
+    try:
+        medicoes = bots(porta, max(2, tamanho // 10 * 2), semente=99)
+    finally:
+        processo.kill()
+        processo.wait()
+    erros += sum(medicoes.erros.values())
+    for nome, valor in carga.percentis(medicoes.ida_e_volta_ms).items():
+        if nome != "max":
+            resultado[f"servidor.salas_move_update_{nome}"] = latencia(valor)
+    if erros:
+        print(f"  aviso: {erros} erros nos bots; as latências podem não valer", file=sys.stderr)
+    return resultado
+
+
+MEDIDORES = {
+    "regras": medir_regras,
+    "cliente": medir_cliente,
+    "protocolo": medir_protocolo,
+    "servidor": medir_servidor,
+}
+
+
+def rodar(grupos, rapido=False):
+    tamanho = 20 if rapido else 100
+    repeticoes = 3 if rapido else 5
+    resultados = {}
+    for grupo in grupos:
+        inicio = time.perf_counter()
+        resultados.update(MEDIDORES[grupo](tamanho if grupo != "protocolo" else tamanho * 100, repeticoes))
+        print(f"{grupo}: {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+    return {
+        "versao": VERSAO,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "rapido": rapido,
+        "resultados": resultados,
+    }
+
+
+def mostrar(dados):
+    for nome, medida in sorted(dados["resultados"].items()):
+        print(f"{nome:45s} {medida['valor']:>14,.2f} {medida['unidade']}")
+
+
+def comparar(base, novo, limite):
+    """Imprime a variação de cada medida e devolve os nomes das que pioraram mais que `limite` %."""
+    regressoes = []
+    print(f"{'medida':45s} {'base':>14s} {'novo':>14s} {'variação':>9s}")
+    for nome in sorted(set(base["resultados"]) | set(novo["resultados"])):
+        antes = base["resultados"].get(nome)
+        depois = novo["resultados"].get(nome)
+        if antes is None or depois is None:
+            print(f"{nome:45s} {'(só em um dos arquivos)':>39s}")
+            continue
+        variacao = (depois["valor"] - antes["valor"]) / antes["valor"] * 100 if antes["valor"] else 0.0
+        # Piora é cair vazão ou subir latência
+        piora = -variacao if depois["maior_melhor"] else variacao
+        marca = ""
+        if piora > limite:
+            marca = "  REGRESSÃO"
+            regressoes.append(nome)
+        elif piora < -limite:
+            marca = "  melhora"
+        print(f"{nome:45s} {antes['valor']:>14,.2f} {depois['valor']:>14,.2f} {variacao:>+8.1f}%{marca}")
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do Halma.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_rodar = sub.add_parser("rodar", help="roda os benchmarks e grava o JSON")
+    p_rodar.add_argument("--saida", help="arquivo JSON dos resultados (sem ele, só imprime)")
+    p_rodar.add_argument("--grupos", nargs="+", choices=GRUPOS, default=list(GRUPOS))
+    p_rodar.add_argument("--rapido", action="store_true", help="lotes menores, para um teste rápido")
+    p_comparar = sub.add_parser("comparar", help="compara dois JSON; sai com código 1 se houver regressão")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("novo")
+    p_comparar.add_argument("--limite", type=float, default=10.0, help="piora tolerada, em %%")
+    args = parser.parse_args()
+
+    if args.comando == "rodar":
+        dados = rodar(args.grupos, args.rapido)
+        mostrar(dados)
+        if args.saida:
+            with open(args.saida, 'w', encoding='utf-8') as arquivo:
+                json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+    else:
+        with open(args.base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        with open(args.novo, encoding='utf-8') as arquivo:
+            novo = json.load(arquivo)
+        if base.get("rapido") != novo.get("rapido"):
+            print("Aviso: um dos arquivos foi gerado com --rapido; os números não são comparáveis.")
+        regressoes = comparar(base, novo, args.limite)
+        if regressoes:
+            print(f"{len(regressoes)} regressão(ões) acima de {args.limite:.0f}%: {', '.join(regressoes)}")
+            sys.exit(1)
@@ -0,0 +1,189 @@
+# diario.py
+"""
+Diário de partida em disco, para recuperar o jogo se o servidor cair.
+
+Cada partida tem dois arquivos só de acréscimo (append-only):
+  <base>.mov   cabeçalho + um registro de 4 bytes por lance (jogador, origem, destino, 0)
+  <base>.snap  cabeçalho + uma foto do tabuleiro a cada K lances (nº do lance, vez,
+               vencedor e os bitboards dos dois jogadores)
+
+Para restaurar basta pegar a última foto e refazer no máximo K lances, então o tempo de
+recuperação não cresce com o tamanho da partida. A leitura é feita com mmap.
+
+Uso da ferramenta: python diario.py resumo PASTA
+                   python diario.py mostrar BASE
+"""
+import glob
+import mmap
+import os
+import struct
+import sys
+from tabuleiro import HalmaGame, geometria
+
+VERSAO = 1
+CABECALHO = struct.Struct('<4sBBH')  # assinatura, versão, tamanho do tabuleiro, intervalo K
+LANCE = struct.Struct('<BBBB')
+ASSINATURA_LANCES = b'HLMV'
+ASSINATURA_FOTOS = b'HLSN'
+
+
+def _bytes_tabuleiro(board_size):
+    return (board_size * board_size + 7) // 8
+
+
+def _formato_foto(board_size):
+    # nº de lances já aplicados, vez, vencedor (0 = nenhum), bitboard do jogador 1, do jogador 2
+    n = _bytes_tabuleiro(board_size)
+    return struct.Struct(f'<IBB{n}s{n}s')
+
+
+class Diario:
+    """Grava os lances de um HalmaGame à medida que são aplicados."""
+
+    def __init__(self, base, board_size=10, intervalo_foto=32):
+        self.base = base
+        self.board_size = board_size
+        self.intervalo_foto = intervalo_foto
+        self.formato_foto = _formato_foto(board_size)
+        # Se o servidor caiu no meio de uma escrita, descarta o registro pela metade
+        self._aparar(base + ".mov", LANCE.size)
+        self._aparar(base + ".snap", self.formato_foto.size)
+        # buffering=0: cada registro vai para o sistema operacional assim que é escrito
+        self.arquivo_lances = self._abrir(base + ".mov", ASSINATURA_LANCES)
+        self.arquivo_fotos = self._abrir(base + ".snap", ASSINATURA_FOTOS)
+        self.lances = (os.path.getsize(base + ".mov") - CABECALHO.size) // LANCE.size
+
+    @staticmethod
+    def _aparar(caminho, tamanho_registro):
+        if os.path.exists(caminho):
+            tamanho = os.path.getsize(caminho)
+            if tamanho > CABECALHO.size:
+                sobra = (tamanho - CABECALHO.size) % tamanho_registro
+                if sobra:
+                    os.truncate(caminho, tamanho - sobra)
+
+    def _abrir(self, caminho, assinatura):
+        novo = not os.path.exists(caminho) or os.path.getsize(caminho) == 0
+        arquivo = open(caminho, 'ab', buffering=0)
+        if novo:
+            arquivo.write(CABECALHO.pack(assinatura, VERSAO, self.board_size, self.intervalo_foto))
+        return arquivo
+
+    def registrar(self, jogo, player, from_pos, to_pos):
+        """Acrescenta um lance já aplicado em `jogo` e tira uma foto a cada K lances."""
+        n = self.board_size
+        self.arquivo_lances.write(LANCE.pack(player, from_pos[0] * n + from_pos[1],
+                                             to_pos[0] * n + to_pos[1], 0))
+        self.lances += 1
+        if self.lances % self.intervalo_foto == 0:
+            self.foto(jogo)
+
+    def foto(self, jogo):
+        tamanho = _bytes_tabuleiro(self.board_size)
+        self.arquivo_fotos.write(self.formato_foto.pack(
+            self.lances, jogo.current_turn, jogo.winner or 0,
+            jogo.pecas[1].to_bytes(tamanho, 'little'), jogo.pecas[2].to_bytes(tamanho, 'little')))
+
+    def fechar(self):
+        self.arquivo_lances.close()
+        self.arquivo_fotos.close()
+
+
+def _mapear(caminho, assinatura):
+    """Abre o arquivo com mmap e devolve (mapa, board_size, intervalo), ou None se estiver vazio."""
+    with open(caminho, 'rb') as arquivo:
+        if os.fstat(arquivo.fileno()).st_size < CABECALHO.size:
+            return None
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+    marca, versao, board_size, intervalo = CABECALHO.unpack_from(mapa, 0)
+    if marca != assinatura or versao != VERSAO:
+        mapa.close()
+        raise ValueError(f"{caminho} não é um diário válido.")
+    return mapa, board_size, intervalo
+
+
+def ultima_foto(base):
+    """(lances, vez, vencedor, pecas1, pecas2) da última foto completa, ou None."""
+    mapeado = _mapear(base + ".snap", ASSINATURA_FOTOS) if os.path.exists(base + ".snap") else None
+    if mapeado is None:
+        return None
+    mapa, board_size, _ = mapeado
+    try:
+        formato = _formato_foto(board_size)
+        # Um registro pela metade no fim (queda no meio da escrita) é ignorado
+        quantidade = (len(mapa) - CABECALHO.size) // formato.size
+        if quantidade == 0:
+            return None
+        lances, vez, vencedor, p1, p2 = formato.unpack_from(mapa, CABECALHO.size + (quantidade - 1) * formato.size)
+        return lances, vez, vencedor, int.from_bytes(p1, 'little'), int.from_bytes(p2, 'little')
+    finally:
+        mapa.close()
+
+
+def ler_lances(base, inicio=0):
+    """Lista de (jogador, origem, destino) a partir do lance `inicio`, em índices de casa."""
+    mapeado = _mapear(base + ".mov", ASSINATURA_LANCES)
+    if mapeado is None:
+        return []
+    mapa, _, _ = mapeado
+    try:
+        fim = CABECALHO.size + (len(mapa) - CABECALHO.size) // LANCE.size * LANCE.size
+        return [(player, origem, destino)
+                for player, origem, destino, _ in LANCE.iter_unpack(mapa[CABECALHO.size + inicio * LANCE.size:fim])]
+    finally:
+        mapa.close()
+
+
+def tamanho_tabuleiro(base):
+    mapeado = _mapear(base + ".mov", ASSINATURA_LANCES)
+    if mapeado is None:
+        raise ValueError(f"{base}.mov está vazio.")
+    mapeado[0].close()
+    return mapeado[1]
+
+
+def restaurar(base):
+    """Reconstrói o HalmaGame a partir da última foto e dos lances depois dela."""
+    board_size = tamanho_tabuleiro(base)
+    jogo = HalmaGame(board_size)
+    inicio = 0
+    foto = ultima_foto(base)
+    if foto is not None:
+        inicio, vez, vencedor, p1, p2 = foto
+        jogo.restore_state(p1, p2, vez, vencedor or None, inicio)
+
+    posicoes = jogo.geo.posicoes
+    for player, origem, destino in ler_lances(base, inicio):
+        jogo.move_piece(player, posicoes[origem], posicoes[destino])
+    return jogo
+
+
+def resumo(pasta):
+    """Varre todos os diários de uma pasta e imprime estatísticas das partidas."""
+    bases = sorted(caminho[:-len(".mov")] for caminho in glob.glob(os.path.join(pasta, "*.mov")))
+    vitorias = [0, 0, 0]
+    total_lances = 0
+    for base in bases:
+        jogo = restaurar(base)
+        vitorias[jogo.winner or 0] += 1
+        with open(base + ".mov", 'rb') as arquivo:
+            total_lances += (os.fstat(arquivo.fileno()).st_size - CABECALHO.size) // LANCE.size
+    print(f"{len(bases)} partidas, {total_lances} lances "
+          f"(média {total_lances / len(bases) if bases else 0:.1f} por partida)")
+    print(f"  Jogador 1: {vitorias[1]}  Jogador 2: {vitorias[2]}  Em andamento/sem vencedor: {vitorias[0]}")
+
+
+def mostrar(base):
+    posicoes = geometria(tamanho_tabuleiro(base)).posicoes
+    for numero, (player, origem, destino) in enumerate(ler_lances(base), 1):
+        print(f"{numero:4d}. J{player} {posicoes[origem]} -> {posicoes[destino]}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("resumo", "mostrar"):
+        print(__doc__)
+        sys.exit(1)
+    if sys.argv[1] == "resumo":
+        resumo(sys.argv[2])
+    else:
+        mostrar(sys.argv[2])
@@ -0,0 +1,190 @@
+# finais.py
+"""
+Tabela de finais: quantos lances faltam para um jogador completar a meta quando sobram no
+máximo K peças fora dela.
+
+A tabela considera a corrida "solo", só com as peças do próprio jogador no tabuleiro (no
+fim da partida os dois exércitos já se cruzaram). Os lances do Halma são reversíveis (todo
+passo e toda sequência de saltos pode ser desfeita), então o grafo de posições é não
+direcionado e uma BFS a partir da posição final (as 10 peças na meta) dá a distância de
+todas as posições com até K peças de fora, usando só caminhos que ficam dentro desse
+conjunto.
+
+Cada posição tem um índice fixo (hash perfeito) pelo sistema combinatório de números:
+quais casas da meta estão vazias e quais casas de fora estão ocupadas. O arquivo é um
+cabeçalho e um byte de distância por índice, lido com mmap; vários processos abrindo o
+mesmo arquivo dividem as mesmas páginas de memória e nada é carregado de uma vez.
+
+As posições são guardadas do ponto de vista do jogador 1 (meta no canto inferior direito);
+as do jogador 2 são giradas 180° antes da consulta.
+
+Uso: python finais.py gerar finais.tb --k 2
+     python finais.py info finais.tb
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from math import comb
+from tabuleiro import alcance, geometria, indices
+
+VERSAO = 1
+ASSINATURA = b'HLTB'
+CABECALHO = struct.Struct('<4sBBBB')  # assinatura, versão, tamanho do tabuleiro, K, reservado
+DESCONHECIDA = 255  # posição fora do alcance da BFS (ou longe demais para um byte)
+
+
+class Indexador:
+    """Numeração das posições de um jogador com até `k` peças fora da meta."""
+
+    def __init__(self, board_size=10, k=2):
+        self.geo = geo = geometria(board_size)
+        self.k = k
+        self.meta = geo.meta[1]
+        casas_meta = list(indices(self.meta))
+        casas_fora = [i for i in range(board_size * board_size) if not self.meta >> i & 1]
+        self.ordem_meta = {casa: i for i, casa in enumerate(casas_meta)}
+        self.ordem_fora = {casa: i for i, casa in enumerate(casas_fora)}
+        self.total_fora = len(casas_fora)
+        # Bloco j: posições com j peças fora (e j casas da meta vazias)
+        self.inicio = []
+        total = 0
+        for j in range(k + 1):
+            self.inicio.append(total)
+            total += comb(len(casas_meta), j) * comb(self.total_fora, j)
+        self.total = total
+
+    def indice(self, pecas):
+        """Índice da posição (bitboard do jogador 1), ou None se tiver mais de k peças fora."""
+        fora = pecas & ~self.meta
+        j = fora.bit_count()
+        if j > self.k:
+            return None
+        rank_vazias = 0
+        for i, casa in enumerate(indices(self.meta & ~pecas)):
+            rank_vazias += comb(self.ordem_meta[casa], i + 1)
+        rank_fora = 0
+        for i, casa in enumerate(indices(fora)):
+            rank_fora += comb(self.ordem_fora[casa], i + 1)
+        return self.inicio[j] + rank_vazias * comb(self.total_fora, j) + rank_fora
+
+
+def girar(geo, pecas):
+    """Bitboard girado 180°: leva as peças do jogador 2 para o ponto de vista do jogador 1."""
+    ultima = geo.board_size * geo.board_size - 1
+    girado = 0
+    for i in indices(pecas):
+        girado |= 1 << (ultima - i)
+    return girado
+
+
+def gerar(caminho, board_size=10, k=2):
+    """BFS a partir da posição final; grava um byte de distância por índice."""
+    indexador = Indexador(board_size, k)
+    geo = indexador.geo
+    distancias = bytearray([DESCONHECIDA]) * indexador.total
+    final = indexador.meta
+    distancias[indexador.indice(final)] = 0
+    nivel = [final]
+    distancia = 0
+    while nivel and distancia < DESCONHECIDA - 1:
+        distancia += 1
+        proximo = []
+        for pecas in nivel:
+            for origem in indices(pecas):
+                sem_ela = pecas & ~(1 << origem)
+                for destino in indices(alcance(geo, sem_ela, origem)):
+                    nova = sem_ela | (1 << destino)
+                    i = indexador.indice(nova)
+                    if i is not None and distancias[i] == DESCONHECIDA:
+                        distancias[i] = distancia
+                        proximo.append(nova)
+        nivel = proximo
+
+    temporario = caminho + ".tmp"
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(CABECALHO.pack(ASSINATURA, VERSAO, board_size, k, 0))
+        arquivo.write(distancias)
+    os.replace(temporario, caminho)  # quem já está lendo a tabela antiga não vê arquivo pela metade
+    return indexador.total, distancia - 1
+
+
+class TabelaFinais:
+    """Consulta a tabela gravada por `gerar`, direto do arquivo mapeado em memória."""
+
+    def __init__(self, caminho):
+        with open(caminho, 'rb') as arquivo:
+            self.mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        marca, versao, board_size, k, _ = CABECALHO.unpack_from(self.mapa, 0)
+        if marca != ASSINATURA or versao != VERSAO:
+            self.mapa.close()
+            raise ValueError(f"{caminho} não é uma tabela de finais válida.")
+        self.board_size = board_size
+        self.k = k
+        self.indexador = Indexador(board_size, k)
+        if len(self.mapa) != CABECALHO.size + self.indexador.total:
+            self.mapa.close()
+            raise ValueError(f"{caminho} está incompleto.")
+
+    def distancia(self, pecas, player):
+        """Lances que faltam para `player` completar a meta, ou None se a posição não está na tabela."""
+        geo = self.indexador.geo
+        if pecas.bit_count() != geo.tamanho_meta:
+            return None
+        if player == 2:
+            pecas = girar(geo, pecas)
+        i = self.indexador.indice(pecas)
+        if i is None:
+            return None
+        d = self.mapa[CABECALHO.size + i]
+        return None if d == DESCONHECIDA else d
+
+    def melhor_lance(self, jogo, player):
+        """
+        ((from_pos, to_pos), distância depois do lance) que mais aproxima `player` do fim,
+        ou None se a posição não está na tabela. Os lances vêm do jogo de verdade (com as
+        peças do adversário); só a avaliação é a da corrida solo.
+        """
+        if jogo.board_size != self.board_size or self.distancia(jogo.pecas[player], player) is None:
+            return None
+        n = self.board_size
+        pecas = jogo.pecas[player]
+        melhor = None
+        for from_pos, to_pos in jogo.generate_moves(player):
+            nova = pecas ^ (1 << (from_pos[0] * n + from_pos[1])) ^ (1 << (to_pos[0] * n + to_pos[1]))
+            d = self.distancia(nova, player)
+            if d is not None and (melhor is None or d < melhor[1]):
+                melhor = ((from_pos, to_pos), d)
+        return melhor
+
+    def fechar(self):
+        self.mapa.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera ou inspeciona a tabela de finais do Halma.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_gerar = sub.add_parser("gerar", help="roda a análise retrógrada e grava o arquivo")
+    p_gerar.add_argument("caminho")
+    p_gerar.add_argument("--k", type=int, default=2, help="máximo de peças fora da meta")
+    p_gerar.add_argument("--tamanho", type=int, default=10, help="tamanho do tabuleiro")
+    p_info = sub.add_parser("info", help="mostra o cabeçalho e a distribuição das distâncias")
+    p_info.add_argument("caminho")
+    args = parser.parse_args()
+
+    if args.comando == "gerar":
+        inicio = time.perf_counter()
+        total, maior = gerar(args.caminho, args.tamanho, args.k)
+        print(f"{total} posições, maior distância {maior}, {time.perf_counter() - inicio:.1f}s")
+    else:
+        tabela = TabelaFinais(args.caminho)
+        contagem = {}
+        for d in tabela.mapa[CABECALHO.size:]:
+            contagem[d] = contagem.get(d, 0) + 1
+        print(f"Tabuleiro {tabela.board_size}x{tabela.board_size}, até {tabela.k} peças fora da meta, "
+              f"{tabela.indexador.total} posições")
+        for d in sorted(contagem):
+            nome = "desconhecida" if d == DESCONHECIDA else str(d)
+            print(f"  {nome:>12}: {contagem[d]}")
+        tabela.fechar()
@@ -1,30 +1,66 @@
 # jogador.py
+import time
+_INICIO = time.perf_counter()  # antes de qualquer import pesado, para medir a abertura
+import os
 import socket
-from PIL import Image, ImageTk
+import sys
+from protocolo import Decodificador, codificar, enviar
+from cliente import (BOARD_SIZE, P1_INITIAL_POSITIONS, P2_INITIAL_POSITIONS, EstadoCliente,
+                     mensagem_move)
+import queue
 import threading
 import tkinter as tk
-from tkinter import simpledialog, scrolledtext, messagebox
+from tkinter import scrolledtext, messagebox
 
 HOST = '127.0.0.1'
 PORT = 65432
-BOARD_SIZE = 10
 CELL_SIZE = 40
-P1_INITIAL_POSITIONS = [
-    (0, 0), (1, 0), (2, 0), (3, 0), (0, 1), (1, 1), (2, 1), (0, 2), (1, 2), (0, 3)
-]
-P2_INITIAL_POSITIONS = [
-    (BOARD_SIZE - 1 - r, BOARD_SIZE - 1 - c) for r, c in P1_INITIAL_POSITIONS
-]
+TAMANHO_PECA = CELL_SIZE - 8
+# No executável do PyInstaller os arquivos ficam em sys._MEIPASS, não ao lado do script
+PASTA_BASE = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+INTERVALO_EVENTOS_MS = 16  # de quanto em quanto tempo o Tk aplica o que chegou da rede
+DESCONECTADO = object()  # evento que a thread de rede enfileira quando a conexão cai de vez
+SEM_SERVIDOR = object()  # a primeira conexão não foi aceita
+RECONECTANDO = object()  # a conexão caiu e a thread de rede está tentando voltar
+TENTATIVAS_RECONEXAO = 6  # espera 0,25 s e dobra a cada tentativa (uns 15 s no total)
+# Conjuntos para o teste de "casa na zona inicial" ser O(1)
+ZONA_P1 = frozenset(P1_INITIAL_POSITIONS)
+ZONA_P2 = frozenset(P2_INITIAL_POSITIONS)
+
+
+def caminho_asset(nome):
+    return os.path.join(PASTA_BASE, "assets", nome)
+
+
+def imagem_peca(nome):
+    """
+    PhotoImage da peça já no tamanho da casa, lida direto pelo Tk (sem PIL). A versão
+    reduzida fica salva em assets/ na primeira vez; só então o PIL é importado.
+    """
+    reduzida = caminho_asset(f"{nome}_{TAMANHO_PECA}.png")
+    if not os.path.exists(reduzida):
+        from PIL import Image, ImageTk
+        with Image.open(caminho_asset(f"{nome}.png")) as original:
+            imagem = original.resize((TAMANHO_PECA, TAMANHO_PECA), Image.LANCZOS)
+        try:
+            imagem.save(reduzida)
+        except OSError:
+            return ImageTk.PhotoImage(imagem)  # pasta sem permissão de escrita: fica só em memória
+    return tk.PhotoImage(file=reduzida)
+
 
 class HalmaClient:
-    def __init__(self, master):
+    def __init__(self, master, conectar=True):
         self.master = master
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
-        self.board = [[0] * BOARD_SIZE for _ in range(BOARD_SIZE)]
-        self.jogador_id = 0
-        self.is_my_turn = False
+        # Tabuleiro, id e vez ficam no estado sem interface (cliente.py)
+        self.estado = EstadoCliente()
         self.selected_piece = None
         self.possible_moves = []
+        # Mensagens do servidor, da thread de rede para o laço do Tk
+        self.eventos = queue.Queue()
+        self.encerrando = False  # fechando a janela: a queda da conexão não é para reconectar
+        self.client_socket = None
 
         self.carrega_imagens()
 
@@ -33,20 +69,35 @@ class HalmaClient:
         self.scheduled_job = None # Para gerenciar o timer das notificações
 
         self.construir_ui()
-        self.conectar_ao_servidor()
-        self.dispor_pecas()
+        self.draw_board()
+        self.master.after(INTERVALO_EVENTOS_MS, self.processar_eventos)
+        if conectar:
+            # Só conecta depois que a janela foi desenhada pela primeira vez
+            self.master.after_idle(self.conectar_ao_servidor)
+
+    @property
+    def board(self):
+        return self.estado.board
+
+    @property
+    def jogador_id(self):
+        return self.estado.jogador_id
+
+    @property
+    def is_my_turn(self):
+        return self.estado.is_my_turn
+
+    @is_my_turn.setter
+    def is_my_turn(self, value):
+        self.estado.is_my_turn = value
 
     def carrega_imagens(self):
         """Carrega as imagens das peças"""
         try:
-            planeta1 = Image.open("assets/planeta1.png").resize((32,32), Image.LANCZOS)
-            planeta2 = Image.open("assets/planeta2.png").resize((32,32), Image.LANCZOS)
-
-            #convertendo para o formato tkinter
-            self.planeta1_peca = ImageTk.PhotoImage(planeta1)
-            self.planeta2_peca = ImageTk.PhotoImage(planeta2)
+            self.planeta1_peca = imagem_peca("planeta1")
+            self.planeta2_peca = imagem_peca("planeta2")
 
-        except FileNotFoundError:
+        except (FileNotFoundError, tk.TclError):
             messagebox.showerror("Poxa, aparentemente os arquivos de imagens não foram encontrados!")
             self.master.destroy()
 
@@ -57,6 +108,7 @@ class HalmaClient:
         self.canvas = tk.Canvas(self.master, width=BOARD_SIZE*CELL_SIZE, height=BOARD_SIZE*CELL_SIZE, bg='beige')
         self.canvas.pack()
         self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.construir_tabuleiro()
         self.chat_display = scrolledtext.ScrolledText(self.master, height=6, state='disabled')
         self.chat_display.pack(pady=5, padx=5, fill=tk.X)
         chat_frame = tk.Frame(self.master)
@@ -68,15 +120,12 @@ class HalmaClient:
         self.send_button.pack(side=tk.RIGHT)
         self.botao_desistencia = tk.Button(self.master, text="Desistir da Partida", command=self.desistencia, bg="red", fg="white", activebackground="darkred")
         self.botao_desistencia.pack(pady=5)
+        self.botao_dica = tk.Button(self.master, text="Dica", command=lambda: self.send_message("DICA"))
+        self.botao_dica.pack(pady=(0, 5))
 
     def conectar_ao_servidor(self):
-        try:
-            self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.client_socket.connect((HOST, PORT))
-            threading.Thread(target=self.receive_messages, daemon=True).start()
-        except ConnectionRefusedError:
-            messagebox.showerror("ERRO", "Poxa, não foi possível conectar ao servidor.")
-            self.master.destroy()
+        # O connect também fica na thread de rede, então a janela nunca espera por ele
+        threading.Thread(target=self.receive_messages, daemon=True).start()
     
     def set_status(self, message, color="black", permanent=False):
         """Define uma mensagem de status permanente."""
@@ -114,86 +163,220 @@ class HalmaClient:
         self.botao_desistencia.config(text="Desistir da Partida", bg="red")
 
     def receive_messages(self):
+        """Thread de rede: só decodifica e enfileira. Quem mexe no Tk é o processar_eventos."""
+        try:
+            self.client_socket = socket.create_connection((HOST, PORT))
+        except OSError:
+            self.eventos.put(SEM_SERVIDOR)
+            return
+        # Só tenta voltar quem chegou a receber um assento (e o token) nesta conexão
+        while self.ler_conexao() and self.reconectar():
+            pass
+        if not self.encerrando:
+            self.eventos.put(DESCONECTADO)
+
+    def ler_conexao(self):
+        """Lê até a conexão cair; devolve True se ela trouxe um BEMVINDO."""
+        decodificador = Decodificador()
+        recebeu_assento = False
         while True:
             try:
-                message = self.client_socket.recv(1024).decode('utf-8')
-                if not message: 
+                data = self.client_socket.recv(4096)
+                if not data:
                     break
-                
-                parts = message.split(':')
-                command = parts[0]
-
-                if command == "BEMVINDO":
-                    self.jogador_id = int(parts[1])
-                    self.master.title(f"Halma - Jogador {self.jogador_id}")
-                    self.set_status(f"Você é o Jogador {self.jogador_id}. Aguardando oponente.", permanent=True)
-                elif command == "INICIAR_JOGO":
-                    self.set_status("Jogo iniciado!", permanent=True)
-                elif command == "SEU_TURNO":
-                    self.is_my_turn = True
-                    self.set_status("É a sua vez!", color="green", permanent=True)
-                elif command == "UPDATE":
-                    from_pos = tuple(map(int, parts[1].split(',')))
-                    to_pos = tuple(map(int, parts[2].split(',')))
-                    self.update_board(from_pos, to_pos)
-                    self.is_my_turn = False
-                    self.set_status("Vez do oponente.", color="darkred", permanent=True)
-                elif command == "CHAT":
-                    sender_id, chat_msg = parts[1], ":".join(parts[2:])
-                    self.display_message(f"Jogador {sender_id}: {chat_msg}")
-                elif command == "VENCEDOR":
-                    winner_id = int(parts[1])
-                    self.is_my_turn = False
-                    reason = " Por desistência." if len(parts) > 2 else "."
-                    if winner_id == self.jogador_id:
-                        self.set_status("Você venceu!" + reason, color="blue", permanent=True)
-                    else:
-                        self.set_status("Você perdeu." + reason, color="black", permanent=True)
-                elif command == "ERRO":
-                    # Usa o novo sistema de notificação em vez de um messagebox
-                    self.set_status(f"Aviso: {parts[1]}")
-                elif command == "OPONENTE_DESCONECTOU":
-                    self.is_my_turn = False
-                    self.set_status("Oponente desconectou. O jogo terminou.", permanent=True)
-            except ConnectionResetError:
-                messagebox.showerror("Desconectado", "A conexão com o servidor foi perdida.")
+                # Uma leitura pode trazer mais de uma mensagem do servidor
+                for message in decodificador.alimentar(data):
+                    recebeu_assento = recebeu_assento or message.startswith("BEMVINDO:")
+                    self.eventos.put(message)
+            except (OSError, ValueError):
                 break
+        return recebeu_assento
 
-    def dispor_pecas(self):
-        for r, c in P1_INITIAL_POSITIONS: self.board[r][c] = 1
-        for r, c in P2_INITIAL_POSITIONS: self.board[r][c] = 2
-        self.draw_board()
+    def reconectar(self):
+        """
+        Volta pela porta PORT + 1 com o token da sessão (RETOMAR). O servidor devolve o mesmo
+        assento e uma foto do jogo (SYNC), então nada do que se perdeu precisa ser refeito.
+        """
+        token = self.estado.token
+        if self.encerrando or token is None or self.estado.vencedor is not None:
+            return False
+        self.eventos.put(RECONECTANDO)
+        espera = 0.25
+        for _ in range(TENTATIVAS_RECONEXAO):
+            try:
+                sock = socket.create_connection((HOST, PORT + 1), timeout=2)
+                sock.settimeout(None)
+                enviar(sock, f"RETOMAR:{token}")
+                self.client_socket = sock
+                return True
+            except OSError:
+                time.sleep(espera)
+                espera *= 2
+        return False
 
-    def draw_board(self):
-        self.canvas.delete("all")
+    def processar_eventos(self):
+        """
+        Roda no laço do Tk a cada INTERVALO_EVENTOS_MS: aplica tudo o que chegou desde a
+        última vez e redesenha uma vez só (casas mudadas, linhas de chat e status).
+        """
+        lote = {"casas": set(), "sync": False, "chat": [], "status": None, "selecao": False}
+        desconectou = False
+        try:
+            while True:
+                message = self.eventos.get_nowait()
+                if message is DESCONECTADO:
+                    desconectou = True
+                    break
+                if message is SEM_SERVIDOR:
+                    messagebox.showerror("ERRO", "Poxa, não foi possível conectar ao servidor.")
+                    self.master.destroy()
+                    return
+                if message is RECONECTANDO:
+                    lote["status"] = ("Conexão perdida. Reconectando...", "darkred", False)
+                    continue
+                self.tratar_mensagem(message, lote)
+        except queue.Empty:
+            pass
+
+        if lote["sync"]:
+            self.draw_board()
+        elif lote["casas"]:
+            self.atualizar_casas(lote["casas"])
+        if lote["selecao"] and not lote["sync"]:
+            self.atualizar_selecao()
+        if lote["chat"]:
+            self.display_message("\n".join(lote["chat"]))
+        if lote["status"]:
+            self.set_status(*lote["status"])
+        if desconectou:
+            messagebox.showerror("Desconectado", "A conexão com o servidor foi perdida.")
+            return
+        self.master.after(INTERVALO_EVENTOS_MS, self.processar_eventos)
+
+    def tratar_mensagem(self, message, lote):
+        """Atualiza o estado com uma mensagem e anota no lote o que precisa ser redesenhado."""
+        command, parts = self.estado.processar(message)
+
+        if command == "BEMVINDO":
+            self.master.title(f"Halma - Jogador {self.jogador_id}")
+            lote["status"] = (f"Você é o Jogador {self.jogador_id}. Aguardando oponente.", "black", True)
+        elif command == "ESPECTADOR":
+            self.master.title("Halma - Espectador")
+            lote["status"] = ("Partida em andamento. Você está assistindo.", "black", True)
+        elif command == "SYNC":
+            # Foto completa do jogo: redesenha o que mudou e ajusta a vez
+            self.selected_piece = None
+            self.possible_moves = []
+            lote["sync"] = True
+            if self.is_my_turn:
+                lote["status"] = ("É a sua vez!", "green", True)
+                threading.Thread(target=self.estado.precalcular, daemon=True).start()
+        elif command == "INICIAR_JOGO":
+            lote["status"] = ("Jogo iniciado!", "black", True)
+        elif command == "SEU_TURNO":
+            lote["status"] = ("É a sua vez!", "green", True)
+            # Os destinos de todas as peças ficam prontos antes do primeiro clique
+            threading.Thread(target=self.estado.precalcular, daemon=True).start()
+        elif command == "UPDATE":
+            lote["casas"].add(tuple(map(int, parts[1].split(','))))
+            lote["casas"].add(tuple(map(int, parts[2].split(','))))
+            # Uma seleção feita sobre o tabuleiro antigo não vale mais
+            if self.selected_piece:
+                self.selected_piece = None
+                self.possible_moves = []
+                lote["selecao"] = True
+            lote["status"] = ("Vez do oponente.", "darkred", True)
+        elif command == "CHAT":
+            sender_id, chat_msg = parts[1], ":".join(parts[2:])
+            lote["chat"].append(f"Jogador {sender_id}: {chat_msg}")
+        elif command == "VENCEDOR":
+            winner_id = self.estado.vencedor
+            reason = " Por desistência." if len(parts) > 2 else "."
+            if winner_id == self.jogador_id:
+                lote["status"] = ("Você venceu!" + reason, "blue", True)
+            else:
+                lote["status"] = ("Você perdeu." + reason, "black", True)
+        elif command == "ERRO":
+            lote["status"] = (f"Aviso: {parts[1]}", "black", False)
+        elif command == "OPONENTE_DESCONECTOU":
+            lote["status"] = ("Oponente desconectou. Aguardando ele voltar...", "black", True)
+        elif command == "OPONENTE_RECONECTOU":
+            lote["status"] = ("Oponente reconectou.", "black", True)
+        elif command == "DICA":
+            # Seleciona a peça sugerida e mostra só o destino da dica
+            from_pos, to_pos = self.estado.dica
+            if self.is_my_turn:
+                self.selected_piece = from_pos
+                self.possible_moves = [to_pos]
+                lote["selecao"] = True
+            lote["status"] = (f"Dica: {from_pos} -> {to_pos} (faltam {parts[3]} lances)", "green", False)
+
+    def construir_tabuleiro(self):
+        """Cria uma única vez todos os itens do canvas e guarda os IDs deles por casa."""
+        self.itens_casa = [[None] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.itens_dica = [[None] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.itens_peca = [[None] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.pecas_desenhadas = [[0] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.dicas_desenhadas = set()
+        self.selecao_desenhada = None
 
         #desenha grid e preenche os quadrados
         for r in range(BOARD_SIZE):
             for c in range(BOARD_SIZE):
                 x1, y1 = c * CELL_SIZE, r * CELL_SIZE
                 fill_color = "#f2e396"
-                if (r, c) in P1_INITIAL_POSITIONS: fill_color = "#E0E8FF"
-                elif (r, c) in P2_INITIAL_POSITIONS: fill_color = "#FFE0E0"
-                self.canvas.create_rectangle(x1, y1, x1 + CELL_SIZE, y1 + CELL_SIZE, outline="black", fill=fill_color)
-
-        #destaca movimentos possíveis
-        for r, c in self.possible_moves:
-            x1, y1 = c * CELL_SIZE, r * CELL_SIZE
-            self.canvas.create_oval(x1 + 15, y1 + 15, x1 + CELL_SIZE - 15, y1 + CELL_SIZE - 15, fill="#90EE90", outline="")
+                if (r, c) in ZONA_P1: fill_color = "#E0E8FF"
+                elif (r, c) in ZONA_P2: fill_color = "#FFE0E0"
+                self.itens_casa[r][c] = self.canvas.create_rectangle(x1, y1, x1 + CELL_SIZE, y1 + CELL_SIZE, outline="black", fill=fill_color)
 
-        #desenhas as peças
+        #movimentos possíveis e peças começam escondidos; depois só mudam de estado
         for r in range(BOARD_SIZE):
             for c in range(BOARD_SIZE):
-                player = self.board[r][c]
-                if player != 0:
-                    # Calcula o centro da célula para posicionar a imagem
-                    x_center = (c * CELL_SIZE) + (CELL_SIZE // 2)
-                    y_center = (r * CELL_SIZE) + (CELL_SIZE // 2)
-                    
-                    # Escolhe qual imagem desenhar
-                    image_to_draw = self.planeta1_peca if player == 1 else self.planeta2_peca
-                    
-                    self.canvas.create_image(x_center, y_center, image=image_to_draw)
+                x1, y1 = c * CELL_SIZE, r * CELL_SIZE
+                self.itens_dica[r][c] = self.canvas.create_oval(x1 + 15, y1 + 15, x1 + CELL_SIZE - 15, y1 + CELL_SIZE - 15, fill="#90EE90", outline="", state="hidden")
+                self.itens_peca[r][c] = self.canvas.create_image(x1 + CELL_SIZE // 2, y1 + CELL_SIZE // 2, state="hidden")
+
+    def draw_board(self):
+        """Sincroniza o tabuleiro inteiro (usado só na abertura); o resto é incremental."""
+        self.atualizar_casas((r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE))
+        self.atualizar_selecao()
+
+    def atualizar_casas(self, posicoes):
+        """Redesenha só as casas indicadas, e só se a peça nelas mudou."""
+        for r, c in posicoes:
+            player = self.board[r][c]
+            if player == self.pecas_desenhadas[r][c]:
+                continue
+            self.pecas_desenhadas[r][c] = player
+            item = self.itens_peca[r][c]
+            if player == 0:
+                self.canvas.itemconfigure(item, state="hidden")
+            else:
+                # Escolhe qual imagem desenhar
+                image_to_draw = self.planeta1_peca if player == 1 else self.planeta2_peca
+                self.canvas.itemconfigure(item, image=image_to_draw, state="normal")
+
+    def atualizar_selecao(self):
+        """Mostra/esconde só as dicas que mudaram e troca o destaque da peça selecionada."""
+        novas = set(self.possible_moves)
+        for r, c in self.dicas_desenhadas - novas:
+            self.canvas.itemconfigure(self.itens_dica[r][c], state="hidden")
+        for r, c in novas - self.dicas_desenhadas:
+            self.canvas.itemconfigure(self.itens_dica[r][c], state="normal")
+        self.dicas_desenhadas = novas
+
+        if self.selected_piece != self.selecao_desenhada:
+            if self.selecao_desenhada:
+                r, c = self.selecao_desenhada
+                self.canvas.itemconfigure(self.itens_casa[r][c], outline="black", width=1)
+            if self.selected_piece:
+                r, c = self.selected_piece
+                self.canvas.itemconfigure(self.itens_casa[r][c], outline="#2E8B57", width=3)
+                # A borda grossa não pode ficar por baixo das casas vizinhas
+                self.canvas.tag_raise(self.itens_casa[r][c])
+                self.canvas.tag_raise(self.itens_dica[r][c])
+                self.canvas.tag_raise(self.itens_peca[r][c])
+            self.selecao_desenhada = self.selected_piece
 
 
     def on_canvas_click(self, event):
@@ -202,62 +385,25 @@ class HalmaClient:
         clicked_pos = (r, c)
         if self.selected_piece and clicked_pos in self.possible_moves:
             from_pos = self.selected_piece
-            self.send_message(f"MOVE:{from_pos[0]},{from_pos[1]}:{clicked_pos[0]},{clicked_pos[1]}")
+            self.send_message(mensagem_move(from_pos, clicked_pos))
             self.selected_piece = None
             self.possible_moves = []
         elif self.board[r][c] == self.jogador_id:
             self.selected_piece = clicked_pos
-            self.possible_moves = self.calculate_possible_moves(r, c)
+            self.possible_moves = self.estado.calculate_possible_moves(r, c)
         else:
             self.selected_piece = None
             self.possible_moves = []
-        self.draw_board()
+        self.atualizar_selecao()
 
-    def calculate_possible_moves(self, r, c):
-        moves = set()
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0: 
-                    continue
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < BOARD_SIZE and 0 <= nc < BOARD_SIZE and self.board[nr][nc] == 0:
-                    moves.add((nr, nc))
-        self._find_jumps_recursive((r, c), moves, set())
-        return list(moves)
-
-    def _find_jumps_recursive(self, current_pos, all_moves, visited_path):
-        r, c = current_pos
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0: 
-                    continue
-                jump_over_r, jump_over_c = r + dr, c + dc
-                dest_r, dest_c = r + 2*dr, c + 2*dc
-                if (0 <= dest_r < BOARD_SIZE and 0 <= dest_c < BOARD_SIZE and
-                        self.board[dest_r][dest_c] == 0 and
-                        self.board[jump_over_r][jump_over_c] != 0):
-                    if (dest_r, dest_c) not in visited_path:
-                        all_moves.add((dest_r, dest_c))
-                        new_path = visited_path.copy()
-                        new_path.add((dest_r, dest_c))
-                        self._find_jumps_recursive((dest_r, dest_c), all_moves, new_path)
-
-    def update_board(self, from_pos, to_pos):
-        player = self.board[from_pos[0]][from_pos[1]]
-        self.board[to_pos[0]][to_pos[1]] = player
-        self.board[from_pos[0]][from_pos[1]] = 0
-        self.draw_board()
-        
     def send_message(self, message):
+        if self.client_socket is None:
+            return
         try: 
-            self.client_socket.send(message.encode('utf-8'))
-        except (BrokenPipeError, ConnectionResetError): 
-            self.handle_server_disconnect()
-            
-    def handle_server_disconnect(self):
-        if self.master.winfo_exists():
-            messagebox.showerror("Desconectado", "A conexão com o servidor foi perdida.")
-            self.master.destroy()
+            self.client_socket.sendall(codificar(message))
+        except OSError:
+            # A thread de rede percebe a queda e tenta reconectar; depois chega um SYNC
+            self.set_status("Sem conexão com o servidor.", color="darkred")
             
     def send_chat_message(self, event=None):
         message = self.chat_input.get()
@@ -273,11 +419,51 @@ class HalmaClient:
         self.chat_display.yview(tk.END)
                 
     def on_closing(self):
+        self.encerrando = True
         if self.client_socket: self.client_socket.close()
         self.master.destroy()
 
 
+def medir_inicio(vezes):
+    """Abre o jogador `vezes` vezes em processos novos e mede até a primeira pintura da janela."""
+    if getattr(sys, "frozen", False):
+        comando = [sys.executable, "--primeira-pintura"]
+    else:
+        comando = [sys.executable, os.path.abspath(__file__), "--primeira-pintura"]
+    import subprocess
+    internos = []
+    totais = []
+    for _ in range(vezes):
+        inicio = time.perf_counter()
+        saida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+        totais.append((time.perf_counter() - inicio) * 1000)
+        internos.append(float(saida.split()[-1]))
+        print(f"processo {totais[-1]:.0f} ms (desde o primeiro import: {internos[-1]:.0f} ms)")
+    internos.sort()
+    totais.sort()
+    print(f"Mediana de {vezes}: processo {totais[vezes // 2]:.0f} ms, "
+          f"desde o primeiro import {internos[vezes // 2]:.0f} ms")
+
+
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Jogador do Halma.")
+    parser.add_argument("--medir-inicio", type=int, metavar="N",
+                        help="mede N aberturas a frio até a primeira pintura e sai")
+    parser.add_argument("--primeira-pintura", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir_inicio:
+        medir_inicio(args.medir_inicio)
+        sys.exit(0)
+
     root = tk.Tk()
+    if args.primeira_pintura:
+        # Usado pelo --medir-inicio: desenha a janela sem conectar, mede e fecha
+        app = HalmaClient(root, conectar=False)
+        root.update()
+        print(f"{(time.perf_counter() - _INICIO) * 1000:.1f}")
+        root.destroy()
+        sys.exit(0)
     app = HalmaClient(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
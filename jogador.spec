@@ -1,34 +1,35 @@
 # -*- mode: python ; coding: utf-8 -*-
 
-
+# Só as peças já reduzidas vão no pacote; os PNGs originais (1200x1200) ficam de fora
+# e o PIL também, porque o Tk lê os PNGs pequenos sozinho (jogador.imagem_peca).
 a = Analysis(
     ['jogador.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets', 'assets')],
+    datas=[('assets/planeta1_32.png', 'assets'), ('assets/planeta2_32.png', 'assets')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['PIL', 'numpy', 'asyncio', 'concurrent', 'multiprocessing', 'unittest', 'pydoc',
+              'doctest', 'email', 'http', 'xml', 'sqlite3', 'lib2to3'],
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
+# Pasta em vez de arquivo único: nada precisa ser descompactado num diretório temporário
+# a cada abertura. Sem UPX pelo mesmo motivo.
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='jogador',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +37,12 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='jogador',
+)
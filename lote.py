@@ -0,0 +1,129 @@
+# lote.py
+"""
+Avaliação de muitas posições de uma vez com NumPy.
+
+`empacotar` junta N HalmaGame (do mesmo tamanho) num array (N, n, n) de int8 com 0 para
+casa vazia e 1/2 para as peças de cada jogador. As outras funções recebem esse array e
+calculam tudo para o lote inteiro sem laço em Python por posição: distância até a meta,
+peças dentro da meta, vencedor e as máscaras de passos (e saltos simples) legais.
+
+    tabuleiros = empacotar(jogos)
+    notas = pontuacao(tabuleiros)   # mesma conta da avaliação do motor, para cada posição
+"""
+import numpy as np
+from tabuleiro import DIRECOES, geometria
+
+BORDA = -1  # valor das casas de fora do tabuleiro no array com margem
+
+
+class _Mascaras:
+    """Arrays de apoio para um tamanho de tabuleiro, criados uma vez."""
+
+    def __init__(self, n):
+        geo = geometria(n)
+        linhas, colunas = np.indices((n, n))
+        # distancia[p]: linha + coluna até o canto da meta de p (igual a motor.Tabelas.distancia)
+        self.distancia = np.stack([np.zeros((n, n), np.int32),
+                                   (n - 1 - linhas) + (n - 1 - colunas),
+                                   linhas + colunas]).astype(np.int32)
+        # meta[p]: casas da zona de vitória de p
+        self.meta = np.stack([_para_matriz(geo.meta[p], n) for p in range(3)])
+        self.tamanho_meta = geo.tamanho_meta
+
+
+def _para_matriz(mascara, n):
+    bits = np.frombuffer(mascara.to_bytes((n * n + 7) // 8, 'little'), np.uint8)
+    return np.unpackbits(bits, bitorder='little')[:n * n].astype(bool).reshape(n, n)
+
+
+_MASCARAS = {}
+
+
+def _mascaras(n):
+    m = _MASCARAS.get(n)
+    if m is None:
+        m = _MASCARAS[n] = _Mascaras(n)
+    return m
+
+
+def empacotar(jogos):
+    """(N, n, n) int8 com o conteúdo de cada casa, a partir dos bitboards dos jogos."""
+    jogos = list(jogos)
+    if not jogos:
+        raise ValueError("Lote vazio.")
+    n = jogos[0].board_size
+    if any(jogo.board_size != n for jogo in jogos):
+        raise ValueError("Todos os jogos do lote precisam ter o mesmo tamanho de tabuleiro.")
+    tamanho = (n * n + 7) // 8
+    # Um bloco de bytes por jogador com os bitboards de todos os jogos, desempacotado de uma vez
+    tabuleiros = np.zeros((len(jogos), n * n), np.int8)
+    for player in (1, 2):
+        dados = b"".join(jogo.pecas[player].to_bytes(tamanho, 'little') for jogo in jogos)
+        bits = np.unpackbits(np.frombuffer(dados, np.uint8).reshape(len(jogos), tamanho),
+                             axis=1, bitorder='little')[:, :n * n]
+        tabuleiros += bits.view(np.int8) * np.int8(player)
+    return tabuleiros.reshape(len(jogos), n, n)
+
+
+def distancias(tabuleiros, player):
+    """(N,) soma das distâncias das peças de `player` até o canto da meta."""
+    n = tabuleiros.shape[-1]
+    m = _mascaras(n)
+    # Um produto (N, n*n) x (n*n,) em vez de somar um array temporário por posição
+    return (tabuleiros.reshape(-1, n * n) == player).astype(np.int32) @ m.distancia[player].ravel()
+
+
+def pontuacao(tabuleiros):
+    """(N,) a avaliação do motor, do ponto de vista do jogador 1 (maior é melhor para ele)."""
+    return distancias(tabuleiros, 2) - distancias(tabuleiros, 1)
+
+
+def na_meta(tabuleiros, player):
+    """(N,) quantas peças de `player` já estão na zona de vitória."""
+    m = _mascaras(tabuleiros.shape[-1])
+    return ((tabuleiros == player) & m.meta[player]).sum(axis=(1, 2), dtype=np.int32)
+
+
+def vencedores(tabuleiros):
+    """(N,) int8 com o vencedor de cada posição (0 = ninguém), como em check_win_condition."""
+    tamanho_meta = _mascaras(tabuleiros.shape[-1]).tamanho_meta
+    completo1 = na_meta(tabuleiros, 1) == tamanho_meta
+    completo2 = na_meta(tabuleiros, 2) == tamanho_meta
+    return np.where(completo2, 2, np.where(completo1, 1, 0)).astype(np.int8)
+
+
+def _com_margem(tabuleiros):
+    # Duas casas de margem bastam para olhar o destino de um salto em qualquer direção
+    return np.pad(tabuleiros, ((0, 0), (2, 2), (2, 2)), constant_values=BORDA)
+
+
+def _deslocado(margem, n, dr, dc):
+    """Vista de `margem` em que a casa (r, c) mostra o conteúdo de (r + dr, c + dc)."""
+    return margem[:, 2 + dr:2 + dr + n, 2 + dc:2 + dc + n]
+
+
+def passos_legais(tabuleiros, player):
+    """
+    (N, 8, n, n) bool: [k, d, r, c] diz se a peça de `player` em (r, c) pode dar um passo
+    na direção DIRECOES[d] na posição k.
+    """
+    n = tabuleiros.shape[-1]
+    margem = _com_margem(tabuleiros)
+    minhas = tabuleiros == player
+    return np.stack([minhas & (_deslocado(margem, n, dr, dc) == 0) for dr, dc in DIRECOES], axis=1)
+
+
+def saltos_legais(tabuleiros, player):
+    """(N, 8, n, n) bool, igual a passos_legais mas para um salto simples sobre uma peça."""
+    n = tabuleiros.shape[-1]
+    margem = _com_margem(tabuleiros)
+    minhas = tabuleiros == player
+    return np.stack([minhas
+                     & (_deslocado(margem, n, dr, dc) > 0)
+                     & (_deslocado(margem, n, 2 * dr, 2 * dc) == 0)
+                     for dr, dc in DIRECOES], axis=1)
+
+
+def mobilidade(tabuleiros, player):
+    """(N,) quantos passos simples `player` tem em cada posição."""
+    return passos_legais(tabuleiros, player).sum(axis=(1, 2, 3), dtype=np.int32)
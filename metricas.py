@@ -0,0 +1,169 @@
+# metricas.py
+"""
+Métricas do servidor: contadores e histogramas de latência (em ms), expostos em texto
+simples num endpoint HTTP local (formato de exposição do Prometheus), e um log por
+amostragem para não imprimir toda mensagem recebida.
+
+Uso: curl http://127.0.0.1:9465/metrics
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORTA_METRICAS = 9465
+# Limites dos baldes em ms: de 50 µs a 1 s
+BALDES_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+COMANDOS = ("MOVE", "CHAT", "DESISTENCIA", "DICA")
+
+
+def rotulo_comando(command):
+    """Comando desconhecido vira um rótulo só, senão um cliente cria métricas à vontade."""
+    return command if command in COMANDOS else "OUTRO"
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{chave}="{valor}"' for chave, valor in rotulos) + "}"
+
+
+class Histograma:
+    __slots__ = ("contagens", "soma", "total", "_trava")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BALDES_MS) + 1)  # o último balde é o +Inf
+        self.soma = 0.0
+        self.total = 0
+        self._trava = threading.Lock()
+
+    def observar(self, ms):
+        i = bisect.bisect_left(BALDES_MS, ms)
+        with self._trava:
+            self.contagens[i] += 1
+            self.soma += ms
+            self.total += 1
+
+
+class Registro:
+    """Guarda todos os contadores e histogramas, identificados por nome e rótulos."""
+
+    def __init__(self, prefixo="halma"):
+        self.prefixo = prefixo
+        self.contadores = {}
+        self.histogramas = {}
+        self._trava = threading.Lock()
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def histograma(self, nome, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        h = self.histogramas.get(chave)
+        if h is None:
+            with self._trava:
+                h = self.histogramas.setdefault(chave, Histograma())
+        return h
+
+    def observar(self, nome, ms, **rotulos):
+        self.histograma(nome, **rotulos).observar(ms)
+
+    @contextmanager
+    def medir(self, nome, **rotulos):
+        """Mede o tempo do bloco `with` e registra no histograma `nome`."""
+        h = self.histograma(nome, **rotulos)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            h.observar((time.perf_counter() - inicio) * 1000)
+
+    @contextmanager
+    def trava(self, lock, nome):
+        """Entra no `lock` registrando quanto tempo esperou por ele e quanto tempo o segurou."""
+        inicio = time.perf_counter()
+        with lock:
+            adquirido = time.perf_counter()
+            self.observar(f"{nome}_espera_ms", (adquirido - inicio) * 1000)
+            try:
+                yield
+            finally:
+                self.observar(f"{nome}_posse_ms", (time.perf_counter() - adquirido) * 1000)
+
+    def texto(self):
+        """Todas as métricas no formato de texto do Prometheus."""
+        linhas = []
+        with self._trava:
+            contadores = sorted(self.contadores.items())
+            histogramas = sorted(self.histogramas.items(), key=lambda item: item[0])
+        tipos_vistos = set()
+        for (nome, rotulos), valor in contadores:
+            nome_completo = f"{self.prefixo}_{nome}"
+            if nome_completo not in tipos_vistos:
+                tipos_vistos.add(nome_completo)
+                linhas.append(f"# TYPE {nome_completo} counter")
+            linhas.append(f"{nome_completo}{_rotulos(rotulos)} {valor}")
+        for (nome, rotulos), h in histogramas:
+            nome_completo = f"{self.prefixo}_{nome}"
+            if nome_completo not in tipos_vistos:
+                tipos_vistos.add(nome_completo)
+                linhas.append(f"# TYPE {nome_completo} histogram")
+            acumulado = 0
+            for limite, contagem in zip(BALDES_MS + ("+Inf",), h.contagens):
+                acumulado += contagem
+                linhas.append(f"{nome_completo}_bucket{_rotulos(rotulos + (('le', limite),))} {acumulado}")
+            linhas.append(f"{nome_completo}_sum{_rotulos(rotulos)} {h.soma:.6f}")
+            linhas.append(f"{nome_completo}_count{_rotulos(rotulos)} {h.total}")
+        return "\n".join(linhas) + "\n"
+
+
+registro = Registro()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        corpo = registro.texto().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass  # sem uma linha de log por coleta
+
+
+def iniciar_endpoint(porta=PORTA_METRICAS, host='127.0.0.1'):
+    """Sobe o endpoint de métricas numa thread própria (só em localhost por padrão)."""
+    servidor = ThreadingHTTPServer((host, porta), _Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+class LogAmostrado:
+    """Deixa passar só uma a cada `taxa` chamadas; serve para logs de alto volume."""
+
+    def __init__(self, logger, taxa=100):
+        self.logger = logger
+        self.taxa = max(1, taxa)
+        self._contador = 0
+
+    def debug(self, message, *args):
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        self._contador += 1
+        if self._contador % self.taxa == 0:
+            self.logger.debug(message + f" (1 a cada {self.taxa})", *args)
+
+
+def configurar_log(nivel="INFO"):
+    logging.basicConfig(level=getattr(logging, nivel.upper(), logging.INFO),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
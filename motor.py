@@ -0,0 +1,291 @@
+# motor.py
+"""
+Oponente automático para o HalmaGame.
+Negamax com poda alfa-beta e aprofundamento iterativo dentro de um orçamento de tempo por
+lance, ordenação de movimentos, tabela de transposição com hash de Zobrist e uma avaliação
+pela distância das peças até a zona de vitória. No fim da partida, se houver uma tabela de
+finais (finais.py), o lance sai direto dela.
+"""
+import random
+import time
+from tabuleiro import alcance, geometria, indices
+
+VITORIA = 1_000_000
+INFINITO = 10 * VITORIA
+
+# Tipos de entrada na tabela de transposição
+EXATO, INFERIOR, SUPERIOR = 0, 1, 2
+
+
+class _TempoEsgotado(Exception):
+    pass
+
+
+class Tabelas:
+    """Chaves de Zobrist e distâncias até a meta, calculadas uma vez por tamanho de tabuleiro."""
+
+    def __init__(self, geo):
+        n = geo.board_size
+        rng = random.Random(0x4A17)  # semente fixa: os mesmos hashes em qualquer processo
+        self.zobrist = (None,
+                        [rng.getrandbits(64) for _ in range(n * n)],
+                        [rng.getrandbits(64) for _ in range(n * n)])
+        self.lado = rng.getrandbits(64)  # entra no hash quando é a vez do jogador 2
+        # distancia[p][i]: distância "diagonal" (linha + coluna) da casa i até o canto da meta de p.
+        # As 10 casas da meta são exatamente as de menor distância, então a soma mínima é a vitória.
+        self.distancia = (None,
+                          [(n - 1 - r) + (n - 1 - c) for r, c in geo.posicoes],
+                          [r + c for r, c in geo.posicoes])
+
+
+_TABELAS = {}
+
+
+def tabelas(geo):
+    t = _TABELAS.get(geo.board_size)
+    if t is None:
+        t = _TABELAS[geo.board_size] = Tabelas(geo)
+    return t
+
+
+class TabelaTransposicao:
+    """
+    Tabela de tamanho fixo (2**bits entradas) indexada pelos bits baixos do hash.
+    Numa colisão a entrada nova fica no lugar da antiga quando a antiga é de uma busca
+    anterior ou foi buscada com profundidade menor, então a memória nunca cresce.
+    """
+    __slots__ = ("mascara", "chaves", "dados", "geracao")
+
+    def __init__(self, bits=18):
+        tamanho = 1 << bits
+        self.mascara = tamanho - 1
+        self.chaves = [0] * tamanho
+        self.dados = [None] * tamanho
+        self.geracao = 0
+
+    def nova_busca(self):
+        self.geracao += 1
+
+    def buscar(self, h):
+        i = h & self.mascara
+        if self.chaves[i] == h:
+            return self.dados[i]
+        return None
+
+    def guardar(self, h, profundidade, valor, tipo, movimento):
+        i = h & self.mascara
+        antigo = self.dados[i]
+        if (antigo is None or self.chaves[i] == h or antigo[4] != self.geracao
+                or profundidade >= antigo[0]):
+            self.chaves[i] = h
+            self.dados[i] = (profundidade, valor, tipo, movimento, self.geracao)
+
+
+class Motor:
+    """
+    Escolhe lances para um HalmaGame.
+    tempo_ms é o orçamento por lance; bits_tt controla o tamanho da tabela de transposição.
+    Depois de cada lance, `estatisticas` guarda nós visitados, profundidade, tempo e nós/s.
+    `finais` é uma TabelaFinais opcional, consultada antes de buscar.
+    """
+
+    def __init__(self, tempo_ms=300, bits_tt=18, profundidade_maxima=20, finais=None):
+        self.tempo_ms = tempo_ms
+        self.finais = finais
+        self.profundidade_maxima = profundidade_maxima
+        self.tt = TabelaTransposicao(bits_tt)
+        self.estatisticas = {}
+        self.nos = 0
+        self.prazo = 0.0
+        self.pode_parar = False
+
+    def escolher_movimento(self, jogo, player=None):
+        """Devolve o melhor lance (from_pos, to_pos) encontrado no tempo, ou None se não houver."""
+        lado = player or jogo.current_turn
+        if jogo.winner:
+            return None
+
+        if self.finais is not None:
+            inicio = time.perf_counter()
+            resposta = self.finais.melhor_lance(jogo, lado)
+            if resposta is not None:
+                movimento, faltam = resposta
+                self.estatisticas = {"nos": 0, "profundidade": 0, "finais": faltam,
+                                     "tempo_ms": (time.perf_counter() - inicio) * 1000,
+                                     "nos_por_segundo": 0.0}
+                return movimento
+
+        self.geo = geo = jogo.geo
+        self.t = t = tabelas(geo)
+        pecas = list(jogo.pecas)
+
+        h = t.lado if lado == 2 else 0
+        for p in (1, 2):
+            for i in indices(pecas[p]):
+                h ^= t.zobrist[p][i]
+        # Pontuação sempre do ponto de vista do jogador 1: soma das distâncias do 2 menos as do 1
+        s = (sum(t.distancia[2][i] for i in indices(pecas[2]))
+             - sum(t.distancia[1][i] for i in indices(pecas[1])))
+
+        inicio = time.perf_counter()
+        self.prazo = inicio + self.tempo_ms / 1000
+        self.nos = 0
+        self.pode_parar = False
+        self.tt.nova_busca()
+
+        melhor = None
+        profundidade_completa = 0
+        for profundidade in range(1, self.profundidade_maxima + 1):
+            try:
+                valor, movimento = self._raiz(pecas, lado, profundidade, h, s)
+            except _TempoEsgotado:
+                break
+            if movimento is None:
+                break
+            melhor = movimento
+            profundidade_completa = profundidade
+            # Depois da primeira iteração já temos um lance para devolver
+            self.pode_parar = True
+            if abs(valor) >= VITORIA - self.profundidade_maxima or time.perf_counter() >= self.prazo:
+                break
+
+        decorrido = time.perf_counter() - inicio
+        self.estatisticas = {
+            "nos": self.nos,
+            "profundidade": profundidade_completa,
+            "tempo_ms": decorrido * 1000,
+            "nos_por_segundo": self.nos / decorrido if decorrido else 0.0,
+        }
+        if melhor is None:
+            return None
+        posicoes = geo.posicoes
+        return posicoes[melhor[0]], posicoes[melhor[1]]
+
+    def _ordenar(self, pecas, lado, movimento_tt):
+        """Todos os lances de `lado`, com o lance da tabela primeiro e depois os que mais avançam."""
+        geo = self.geo
+        dist = self.t.distancia[lado]
+        ocupadas = pecas[1] | pecas[2]
+        candidatos = []
+        for origem in indices(pecas[lado]):
+            d_origem = dist[origem]
+            for destino in indices(alcance(geo, ocupadas & ~(1 << origem), origem)):
+                candidatos.append((d_origem - dist[destino], origem, destino))
+        candidatos.sort(reverse=True)
+        movimentos = [(origem, destino) for _, origem, destino in candidatos]
+        if movimento_tt is not None and movimento_tt in movimentos:
+            movimentos.remove(movimento_tt)
+            movimentos.insert(0, movimento_tt)
+        return movimentos
+
+    def _raiz(self, pecas, lado, profundidade, h, s):
+        entrada = self.tt.buscar(h)
+        movimentos = self._ordenar(pecas, lado, entrada[3] if entrada else None)
+        alpha, beta = -INFINITO, INFINITO
+        melhor = None
+        for movimento in movimentos:
+            valor = self._filho(pecas, lado, movimento, profundidade, alpha, beta, h, s, 0)
+            if valor > alpha or melhor is None:
+                alpha = max(alpha, valor)
+                melhor = movimento
+        if melhor is not None:
+            self.tt.guardar(h, profundidade, alpha, EXATO, melhor)
+        return alpha, melhor
+
+    def _filho(self, pecas, lado, movimento, profundidade, alpha, beta, h, s, ply):
+        """Joga `movimento`, avalia a posição resultante para `lado` e desfaz o lance."""
+        origem, destino = movimento
+        t = self.t
+        bits = (1 << origem) | (1 << destino)
+        pecas[lado] ^= bits
+        try:
+            meta = self.geo.meta[lado]
+            if pecas[lado] & meta == meta:
+                return VITORIA - ply  # vencer mais cedo vale mais
+            dist = t.distancia[lado]
+            ganho = dist[origem] - dist[destino]
+            s_filho = s + ganho if lado == 1 else s - ganho
+            h_filho = h ^ t.zobrist[lado][origem] ^ t.zobrist[lado][destino] ^ t.lado
+            return -self._negamax(pecas, 3 - lado, profundidade - 1, -beta, -alpha,
+                                  h_filho, s_filho, ply + 1)
+        finally:
+            pecas[lado] ^= bits
+
+    def _negamax(self, pecas, lado, profundidade, alpha, beta, h, s, ply):
+        self.nos += 1
+        if self.pode_parar and not self.nos & 1023 and time.perf_counter() >= self.prazo:
+            raise _TempoEsgotado
+
+        if profundidade == 0:
+            return s if lado == 1 else -s
+
+        alpha_original = alpha
+        entrada = self.tt.buscar(h)
+        movimento_tt = None
+        if entrada is not None:
+            profundidade_tt, valor_tt, tipo, movimento_tt, _ = entrada
+            if profundidade_tt >= profundidade:
+                if tipo == EXATO:
+                    return valor_tt
+                if tipo == INFERIOR:
+                    alpha = max(alpha, valor_tt)
+                else:
+                    beta = min(beta, valor_tt)
+                if alpha >= beta:
+                    return valor_tt
+
+        melhor_valor = -INFINITO
+        melhor = None
+        for movimento in self._ordenar(pecas, lado, movimento_tt):
+            valor = self._filho(pecas, lado, movimento, profundidade, alpha, beta, h, s, ply)
+            if valor > melhor_valor:
+                melhor_valor = valor
+                melhor = movimento
+                if valor > alpha:
+                    alpha = valor
+                    if alpha >= beta:
+                        break  # corte beta
+
+        if melhor is None:
+            return 0  # sem lances: trata como empate
+
+        if melhor_valor <= alpha_original:
+            tipo = SUPERIOR
+        elif melhor_valor >= beta:
+            tipo = INFERIOR
+        else:
+            tipo = EXATO
+        self.tt.guardar(h, profundidade, melhor_valor, tipo, melhor)
+        return melhor_valor
+
+
+if __name__ == "__main__":
+    # Partida do motor contra ele mesmo, para medir latência por lance e nós/s
+    import argparse
+    from tabuleiro import HalmaGame
+
+    parser = argparse.ArgumentParser(description="Mede o motor jogando contra si mesmo.")
+    parser.add_argument("--tempo-ms", type=int, default=300)
+    parser.add_argument("--bits-tt", type=int, default=18)
+    parser.add_argument("--lances", type=int, default=20)
+    parser.add_argument("--finais", help="arquivo da tabela de finais (python finais.py gerar ...)")
+    args = parser.parse_args()
+
+    jogo = HalmaGame()
+    finais = None
+    if args.finais:
+        from finais import TabelaFinais
+        finais = TabelaFinais(args.finais)
+    motor = Motor(tempo_ms=args.tempo_ms, bits_tt=args.bits_tt, finais=finais)
+    for _ in range(args.lances):
+        movimento = motor.escolher_movimento(jogo)
+        if movimento is None:
+            break
+        player = jogo.current_turn
+        jogo.move_piece(player, *movimento)
+        e = motor.estatisticas
+        print(f"J{player} {movimento[0]} -> {movimento[1]}  prof={e['profundidade']} "
+              f"nós={e['nos']} {e['tempo_ms']:.0f}ms {e['nos_por_segundo']:.0f} nós/s")
+        if jogo.winner:
+            print(f"Vencedor: {jogo.winner}")
+            break
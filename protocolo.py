@@ -0,0 +1,81 @@
+# protocolo.py
+"""
+Enquadramento das mensagens trocadas entre servidor e jogador.
+Cada mensagem vai como [tamanho de 4 bytes, big-endian][texto em UTF-8], assim o TCP pode
+juntar ou quebrar as leituras à vontade que o Decodificador remonta as mensagens certinhas.
+"""
+import struct
+
+CABECALHO = struct.Struct('!I')
+TAMANHO_MAXIMO = 64 * 1024  # nenhuma mensagem do jogo chega perto disso
+
+
+def codificar(message):
+    """Transforma uma mensagem (str) em um quadro pronto para ir pelo socket."""
+    payload = message.encode('utf-8')
+    if len(payload) > TAMANHO_MAXIMO:
+        raise ValueError("Mensagem grande demais para o protocolo.")
+    return CABECALHO.pack(len(payload)) + payload
+
+
+def codificar_lote(messages):
+    """Junta várias mensagens em um único buffer, para sair com uma escrita só."""
+    return b"".join(codificar(message) for message in messages)
+
+
+def enviar(sock, *messages):
+    """Envia uma ou mais mensagens de uma vez em um socket bloqueante."""
+    sock.sendall(codificar_lote(messages))
+
+
+class Decodificador:
+    """Decodificador incremental: recebe pedaços de bytes e devolve as mensagens completas."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def alimentar(self, data):
+        """Acrescenta os bytes lidos e devolve a lista de mensagens que ficaram completas."""
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        inicio = 0
+        tamanho_buffer = len(buffer)
+        while tamanho_buffer - inicio >= CABECALHO.size:
+            (tamanho,) = CABECALHO.unpack_from(buffer, inicio)
+            if tamanho > TAMANHO_MAXIMO:
+                raise ValueError("Quadro inválido recebido.")
+            fim = inicio + CABECALHO.size + tamanho
+            if fim > tamanho_buffer:
+                break  # mensagem ainda incompleta, espera o resto
+            messages.append(buffer[inicio + CABECALHO.size:fim].decode('utf-8'))
+            inicio = fim
+        if inicio:
+            del buffer[:inicio]
+        return messages
+
+
+def mensagem_sync(jogo):
+    """
+    Foto compacta do jogo inteiro, para quem entra no meio ou ficou para trás:
+    SYNC:<bitboard do jogador 1 em hex>:<bitboard do jogador 2 em hex>:<vez>:<nº do lance>:<vencedor ou 0>
+    """
+    return (f"SYNC:{jogo.pecas[1]:x}:{jogo.pecas[2]:x}:{jogo.current_turn}:"
+            f"{jogo.move_number}:{jogo.winner or 0}")
+
+
+def ler_sync(parts):
+    """Desfaz a mensagem_sync já separada por ':' -> (pecas1, pecas2, vez, lance, vencedor)."""
+    return (int(parts[1], 16), int(parts[2], 16), int(parts[3]), int(parts[4]), int(parts[5]) or None)
+
+
+def mensagem_dica(finais, jogo, player):
+    """
+    Resposta ao pedido DICA: DICA:<origem r,c>:<destino r,c>:<lances que faltam>, tirada da
+    tabela de finais, ou um ERRO quando a posição ainda não está na tabela.
+    """
+    resposta = finais.melhor_lance(jogo, player) if finais is not None else None
+    if resposta is None:
+        return "ERRO:Sem dica para esta posição."
+    (from_pos, to_pos), faltam = resposta
+    return f"DICA:{from_pos[0]},{from_pos[1]}:{to_pos[0]},{to_pos[1]}:{faltam}"
@@ -0,0 +1,160 @@
+# saida.py
+"""
+Filas de envio por conexão. Quem transmite (broadcast) só coloca bytes na fila e segue em
+frente; uma thread (ou tarefa asyncio) por conexão é que faz a escrita no socket, juntando
+o que estiver acumulado numa escrita só. Assim um cliente lento não trava o jogo dos outros.
+
+Quando a fila de alguém enche, o que estava pendente é descartado e vai só uma foto do
+estado atual (SYNC) no lugar, para a conexão voltar a ficar em dia. Quem continua enchendo
+a fila depois de MAX_ATRASOS fotos é desconectado.
+"""
+import asyncio
+import queue
+import socket
+import threading
+
+LIMITE_FILA = 256
+MAX_ATRASOS = 3
+
+
+class FilaDeSaida:
+    """Fila de envio de um socket bloqueante (servidor com threads)."""
+
+    def __init__(self, conn, foto=None, limite=LIMITE_FILA):
+        self.conn = conn
+        self.foto = foto  # função que devolve os bytes de um SYNC com o estado atual
+        self.fila = queue.Queue(limite)
+        self.atrasos = 0
+        self.aberta = True
+        threading.Thread(target=self._escrever, daemon=True).start()
+
+    def colocar(self, dados):
+        if not self.aberta:
+            return
+        try:
+            self.fila.put_nowait(dados)
+        except queue.Full:
+            self._transbordou()
+
+    def _esvaziar(self):
+        try:
+            while True:
+                self.fila.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _transbordou(self):
+        self.atrasos += 1
+        if self.foto is None or self.atrasos > MAX_ATRASOS:
+            self.fechar()
+            return
+        # Joga fora os deltas pendentes e manda só o estado atual
+        self._esvaziar()
+        try:
+            self.fila.put_nowait(self.foto())
+        except queue.Full:
+            pass  # outra thread encheu a fila de novo; a próxima mensagem tenta outra vez
+
+    def _escrever(self):
+        while True:
+            dados = self.fila.get()
+            if dados is None:
+                return
+            lote = [dados]
+            fim = False
+            # Junta tudo o que já estiver esperando numa escrita só
+            try:
+                while True:
+                    dados = self.fila.get_nowait()
+                    if dados is None:
+                        fim = True
+                        break
+                    lote.append(dados)
+            except queue.Empty:
+                pass
+            try:
+                self.conn.sendall(b"".join(lote))
+            except OSError:
+                self.aberta = False
+                return
+            if fim:
+                return
+
+    def fechar(self):
+        """Descarta o que estiver pendente e encerra a conexão."""
+        if not self.aberta:
+            return
+        self.aberta = False
+        self._esvaziar()
+        self.fila.put_nowait(None)
+        # Destrava um sendall parado e faz a thread de leitura ver o fim da conexão
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class FilaDeSaidaAsync:
+    """A mesma ideia para um StreamWriter do asyncio (servidor de salas)."""
+    __slots__ = ("writer", "foto", "fila", "atrasos", "aberta", "tarefa")
+
+    def __init__(self, writer, foto=None, limite=LIMITE_FILA):
+        self.writer = writer
+        self.foto = foto
+        self.fila = asyncio.Queue(limite)
+        self.atrasos = 0
+        self.aberta = True
+        self.tarefa = asyncio.ensure_future(self._escrever())
+
+    def colocar(self, dados):
+        if not self.aberta:
+            return
+        try:
+            self.fila.put_nowait(dados)
+        except asyncio.QueueFull:
+            self._transbordou()
+
+    def _esvaziar(self):
+        while not self.fila.empty():
+            self.fila.get_nowait()
+
+    def _transbordou(self):
+        self.atrasos += 1
+        if self.foto is None or self.atrasos > MAX_ATRASOS:
+            self.fechar()
+            return
+        self._esvaziar()
+        self.fila.put_nowait(self.foto())
+
+    async def _escrever(self):
+        try:
+            while True:
+                dados = await self.fila.get()
+                if dados is None:
+                    return
+                lote = [dados]
+                fim = False
+                while not self.fila.empty():
+                    dados = self.fila.get_nowait()
+                    if dados is None:
+                        fim = True
+                        break
+                    lote.append(dados)
+                self.writer.write(b"".join(lote))
+                await self.writer.drain()
+                if fim:
+                    return
+        except (ConnectionError, OSError):
+            self.aberta = False
+        finally:
+            self.writer.close()
+
+    def fechar(self):
+        """Descarta o que estiver pendente e encerra a conexão."""
+        if not self.aberta:
+            return
+        self.aberta = False
+        self._esvaziar()
+        self.fila.put_nowait(None)
+        # Fechar o transporte destrava um drain() parado num cliente que não lê
+        self.writer.close()
@@ -0,0 +1,277 @@
+# salas.py
+"""
+Servidor assíncrono com várias salas. Cada sala tem o seu próprio HalmaGame e os seus
+jogadores, e o saguão junta as conexões que chegam em pares para formar as salas.
+
+Espectadores conectam na porta PORT + 1 e mandam ASSISTIR:<sala_id>; recebem uma foto do
+jogo (SYNC) e depois a mesma sequência de UPDATEs dos jogadores, sem poder jogar. Na mesma
+porta um jogador que caiu manda RETOMAR:<token> (o token veio no BEMVINDO) e volta para o
+seu assento recebendo uma foto do jogo.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import secrets
+import time
+from tabuleiro import HalmaGame
+from protocolo import Decodificador, codificar, codificar_lote, mensagem_dica, mensagem_sync
+from diario import Diario
+from finais import TabelaFinais
+from saida import FilaDeSaidaAsync
+from metricas import LogAmostrado, registro as metricas, rotulo_comando
+
+log = logging.getLogger("salas")
+log_mensagens = LogAmostrado(log)
+
+HOST = '127.0.0.1'
+PORT = 65432
+
+
+class Sala:
+    """Uma partida: dois assentos e um jogo. Nada aqui é compartilhado com outras salas."""
+    __slots__ = ("sala_id", "jogo", "jogadores", "espectadores", "diario", "finais", "tokens")
+
+    def __init__(self, sala_id, diario=None, finais=None):
+        self.sala_id = sala_id
+        self.jogo = HalmaGame()
+        self.jogadores = {}  # player_id -> FilaDeSaidaAsync
+        self.espectadores = set()  # FilaDeSaidaAsync de quem só assiste
+        self.diario = diario
+        self.finais = finais  # TabelaFinais compartilhada por todas as salas
+        self.tokens = {}  # player_id -> token de sessão
+
+    def cheia(self):
+        return len(self.jogadores) == 2
+
+    def foto(self):
+        return codificar(mensagem_sync(self.jogo))
+
+    def enviar(self, player_id, *messages):
+        saida = self.jogadores.get(player_id)
+        if saida is not None:
+            saida.colocar(codificar_lote(messages))
+
+    def broadcast(self, *messages, sender_id=None, extra=None):
+        """
+        Coloca as mensagens na fila de cada jogador e espectador (nunca espera ninguém).
+        O lote é codificado uma vez só; `extra` acrescenta mensagens só para alguns jogadores.
+        """
+        with metricas.medir("broadcast_ms"):
+            dados = codificar_lote(messages)
+            for player_id, saida in self.jogadores.items():
+                if player_id != sender_id:
+                    if extra and player_id in extra:
+                        saida.colocar(dados + codificar_lote(extra[player_id]))
+                    else:
+                        saida.colocar(dados)
+            for saida in self.espectadores:
+                saida.colocar(dados)
+
+    def processar(self, player_id, data):
+        """Trata uma mensagem de um jogador desta sala (mesmos comandos do servidor.py)."""
+        log_mensagens.debug("Sala %d, jogador %d: %s", self.sala_id, player_id, data)
+        parts = data.split(':')
+        rotulo = rotulo_comando(parts[0])
+        metricas.incrementar("comandos_total", comando=rotulo)
+        # Aqui não há trava: tudo roda no laço de eventos, que é o recurso disputado
+        with metricas.medir("comando_ms", comando=rotulo):
+            self._executar(player_id, parts)
+
+    def _executar(self, player_id, parts):
+        command = parts[0]
+        jogo = self.jogo
+
+        if command == "MOVE":
+            if jogo.current_turn != player_id:
+                self.enviar(player_id, "ERRO: Calma lá, ainda não é o seu turno!.")
+                return
+
+            from_pos = tuple(map(int, parts[1].split(',')))
+            to_pos = tuple(map(int, parts[2].split(',')))
+
+            with metricas.medir("validacao_ms"):
+                legal = jogo.is_legal_move(player_id, from_pos, to_pos)
+            if legal:
+                with metricas.medir("move_piece_ms"):
+                    jogo.move_piece(player_id, from_pos, to_pos)
+                if self.diario:
+                    self.diario.registrar(jogo, player_id, from_pos, to_pos)
+                update = f"UPDATE:{from_pos[0]},{from_pos[1]}:{to_pos[0]},{to_pos[1]}"
+
+                if jogo.winner:
+                    self.broadcast(update, f"VENCEDOR:{jogo.winner}")
+                else:
+                    self.broadcast(update, extra={jogo.current_turn: ("SEU_TURNO",)})
+            else:
+                metricas.incrementar("lances_invalidos_total")
+                self.enviar(player_id, "ERRO:Movimento inválido.")
+
+        elif command == "CHAT":
+            message = parts[1]
+            self.broadcast(f"CHAT:{player_id}:{message}", sender_id=player_id)
+
+        elif command == "DESISTENCIA":
+            winner = 3 - player_id
+            self.broadcast(f"VENCEDOR:{winner}:DESISTENCIA")
+
+        elif command == "DICA":
+            self.enviar(player_id, mensagem_dica(self.finais, jogo, player_id))
+
+    def sair(self, player_id, saida):
+        # Se o jogador já voltou por outra conexão, esta aqui não ocupa mais o assento
+        if self.jogadores.get(player_id) is not saida:
+            return
+        del self.jogadores[player_id]
+        if self.jogadores and not self.jogo.winner:
+            self.broadcast("OPONENTE_DESCONECTOU")
+
+    def retomar(self, player_id, saida):
+        """Senta de novo um jogador que voltou e manda a foto do jogo para ele e para os outros."""
+        antiga = self.jogadores.get(player_id)
+        if antiga is not None:
+            antiga.fechar()  # conexão meia-aberta que ainda não tinha caído
+        self.jogadores[player_id] = saida
+        jogo = self.jogo
+        mensagens = [f"BEMVINDO:{player_id}:{self.tokens[player_id]}", mensagem_sync(jogo)]
+        if self.cheia() and not jogo.winner and jogo.current_turn == player_id:
+            mensagens.append("SEU_TURNO")
+        self.enviar(player_id, *mensagens)
+        self.broadcast(f"OPONENTE_RECONECTOU:{player_id}", mensagem_sync(jogo), sender_id=player_id)
+
+
+class Saguao:
+    """Recebe as conexões e as coloca em salas, dois jogadores por sala."""
+
+    def __init__(self, pasta_diarios=None, finais=None):
+        self.finais = finais
+        self.salas = {}
+        self.sala_aberta = None  # sala esperando o segundo jogador
+        self._ids = itertools.count(1)
+        self.pasta_diarios = pasta_diarios
+        self.sessoes = {}  # token -> (sala, player_id)
+        # Os ids das salas recomeçam em 1 a cada execução; o instante evita sobrescrever diários
+        self._inicio = int(time.time())
+
+    def entrar(self, writer):
+        """Senta a conexão na sala aberta (ou abre uma nova) e devolve (sala, player_id, saida)."""
+        sala = self.sala_aberta
+        if sala is None:
+            sala_id = next(self._ids)
+            diario = None
+            if self.pasta_diarios:
+                diario = Diario(os.path.join(self.pasta_diarios, f"sala-{self._inicio}-{sala_id}"))
+            sala = Sala(sala_id, diario, self.finais)
+            self.salas[sala.sala_id] = sala
+            self.sala_aberta = sala
+
+        player_id = 1 if 1 not in sala.jogadores else 2
+        saida = FilaDeSaidaAsync(writer, foto=sala.foto)
+        sala.jogadores[player_id] = saida
+        token = secrets.token_hex(8)
+        sala.tokens[player_id] = token
+        self.sessoes[token] = (sala, player_id)
+        sala.enviar(player_id, f"BEMVINDO:{player_id}:{token}")
+
+        if sala.cheia():
+            self.sala_aberta = None
+            log.info("Sala %d: ambos os jogadores conectados. Iniciando o jogo.", sala.sala_id)
+            sala.broadcast("INICIAR_JOGO", extra={1: ("SEU_TURNO",)})
+        return sala, player_id, saida
+
+    def sair(self, sala, player_id, saida):
+        sala.sair(player_id, saida)
+        if not sala.jogadores and sala.sala_id in self.salas:
+            self.salas.pop(sala.sala_id)
+            for token in sala.tokens.values():
+                self.sessoes.pop(token, None)
+            if sala.diario:
+                sala.diario.fechar()
+            for saida in sala.espectadores:
+                saida.fechar()
+            sala.espectadores.clear()
+            if self.sala_aberta is sala:
+                self.sala_aberta = None
+
+    async def handle_conexao(self, reader, writer):
+        sala, player_id, saida = self.entrar(writer)
+        await self._ler_jogador(reader, sala, player_id, saida, Decodificador())
+
+    async def _ler_jogador(self, reader, sala, player_id, saida, decodificador):
+        try:
+            while saida.aberta:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                for message in decodificador.alimentar(data):
+                    sala.processar(player_id, message)
+        except (ConnectionError, IndexError, ValueError):
+            pass
+        finally:
+            # Uma sala que nunca começou é descartada quando fica vazia
+            self.sair(sala, player_id, saida)
+            saida.fechar()
+
+    async def handle_espectador(self, reader, writer):
+        """
+        Porta PORT + 1: a primeira mensagem diz qual sala assistir (ASSISTIR) ou traz o
+        token de um jogador que está voltando (RETOMAR).
+        """
+        decodificador = Decodificador()
+        saida = FilaDeSaidaAsync(writer)
+        sala = None
+        try:
+            while sala is None:
+                data = await reader.read(4096)
+                if not data:
+                    return
+                messages = decodificador.alimentar(data)
+                if not messages:
+                    continue
+                parts = messages[0].split(':')
+                if parts[0] == "RETOMAR":
+                    sessao = self.sessoes.get(parts[1])
+                    if sessao is None:
+                        writer.write(codificar("ERRO:Sessão inválida."))
+                        return
+                    sala, player_id = sessao
+                    saida.foto = sala.foto
+                    sala.retomar(player_id, saida)
+                    for message in messages[1:]:
+                        sala.processar(player_id, message)
+                    await self._ler_jogador(reader, sala, player_id, saida, decodificador)
+                    return
+                if parts[0] != "ASSISTIR":
+                    return
+                sala = self.salas.get(int(parts[1]))
+                if sala is None:
+                    writer.write(codificar("ERRO:Sala não encontrada."))
+                    return
+            saida.foto = sala.foto
+            sala.espectadores.add(saida)
+            saida.colocar(codificar_lote((f"ESPECTADOR:{sala.sala_id}", mensagem_sync(sala.jogo))))
+            # Daqui em diante só esperamos a conexão fechar
+            while saida.aberta and await reader.read(4096):
+                pass
+        except (ConnectionError, IndexError, ValueError):
+            pass
+        finally:
+            if sala is not None:
+                sala.espectadores.discard(saida)
+            saida.fechar()
+
+async def iniciar_servidor_salas(host=HOST, port=PORT, pasta_diarios=None, arquivo_finais=None):
+    if pasta_diarios:
+        os.makedirs(pasta_diarios, exist_ok=True)
+    saguao = Saguao(pasta_diarios, TabelaFinais(arquivo_finais) if arquivo_finais else None)
+    server = await asyncio.start_server(saguao.handle_conexao, host, port, backlog=1024)
+    server_espectadores = await asyncio.start_server(saguao.handle_espectador, host, port + 1, backlog=1024)
+    log.info("Servidor de salas escutando em %s:%d (espectadores em %d)", host, port, port + 1)
+    async with server, server_espectadores:
+        await asyncio.gather(server.serve_forever(), server_espectadores.serve_forever())
+
+
+if __name__ == "__main__":
+    from metricas import configurar_log
+    configurar_log()
+    asyncio.run(iniciar_servidor_salas())
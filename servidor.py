@@ -1,101 +1,351 @@
 # servidor.py
+import logging
+import os
+import secrets
 import socket
 import threading
+import time
 from tabuleiro import HalmaGame
+from protocolo import Decodificador, codificar, codificar_lote, enviar, mensagem_dica, mensagem_sync
+from saida import FilaDeSaida
+from motor import Motor
+from finais import TabelaFinais
+import diario as diario_de_partida
+from metricas import PORTA_METRICAS, LogAmostrado, configurar_log, iniciar_endpoint, registro as metricas, rotulo_comando
+
+log = logging.getLogger("servidor")
+log_mensagens = LogAmostrado(log)  # só uma a cada N mensagens vai para o log
 
 HOST = '127.0.0.1'
 PORT = 65432
 jogadores = []
 player_map = {}
+espectadores = []
+saidas = {}  # conn -> FilaDeSaida; ninguém escreve direto no socket
+sessoes = {}  # token entregue no BEMVINDO -> player_id, para o jogador retomar o assento
 jogo = HalmaGame()
 game_lock = threading.Lock()
+diario = None  # Diario da partida, quando o servidor é iniciado com --diario
+finais = None  # TabelaFinais, quando o servidor é iniciado com --finais
 
-def handle_jogador(conn, player_id):
-    global jogo
-    print(f"[JOGADOR {player_id}] Conectado de {conn.getpeername()}")
+def handle_jogador(conn, player_id, decodificador=None):
+    log.info("Jogador %d conectado de %s", player_id, conn.getpeername())
+    decodificador = decodificador or Decodificador()
 
     while True:
         try:
-            data = conn.recv(1024).decode('utf-8')
+            data = conn.recv(4096)
             if not data:
                 break
 
-            print(f"[JOGADOR {player_id}] Mensagem: {data}")
-            parts = data.split(':')
-            command = parts[0]
+            # Uma leitura pode trazer várias mensagens (ou só um pedaço de uma)
+            for message in decodificador.alimentar(data):
+                processar_mensagem(conn, player_id, message)
 
-            with game_lock:
-                if command == "MOVE":
-                    if jogo.current_turn != player_id:
-                        conn.send("ERRO: Calma lá, ainda não é o seu turno!.".encode('utf-8'))
-                        continue
-                    
-                    from_pos = tuple(map(int, parts[1].split(',')))
-                    to_pos = tuple(map(int, parts[2].split(',')))
-                    
-                    if jogo.is_valid_move(player_id, from_pos, to_pos, []):
-                        jogo.move_piece(player_id, from_pos, to_pos)
-                        broadcast(f"UPDATE:{from_pos[0]},{from_pos[1]}:{to_pos[0]},{to_pos[1]}")
-                        
-                        if jogo.winner:
-                            broadcast(f"VENCEDOR:{jogo.winner}")
-                        else: # Envia o turno para o próximo jogador
-                             jogadores[jogo.current_turn-1].send(f"SEU_TURNO".encode('utf-8'))
-                    else:
-                        conn.send("ERRO:Movimento inválido.".encode('utf-8'))
-                
-                elif command == "CHAT":
-                    message = parts[1]
-                    broadcast(f"CHAT:{player_id}:{message}", sender_conn=conn)
-                
-                elif command == "DESISTENCIA":
-                    winner = 3 - player_id
-                    broadcast(f"VENCEDOR:{winner}:DESISTENCIA")
-
-        except (ConnectionResetError, IndexError):
+        except (OSError, IndexError, ValueError):
             break
 
-    print(f"[JOGADOR {player_id}] Desconectado.")
-    jogadores.remove(conn)
+    log.info("Jogador %d desconectado.", player_id)
+    with game_lock:
+        # Se o jogador já voltou por outra conexão, esta aqui não ocupa mais o assento
+        if conn in jogadores:
+            jogadores.remove(conn)
+            player_map.pop(conn, None)
+            if not jogo.winner:
+                broadcast("OPONENTE_DESCONECTOU")
+        saidas.pop(conn).fechar()
+    conn.close()
+
+def processar_mensagem(conn, player_id, data):
+    log_mensagens.debug("Jogador %d: %s", player_id, data)
+    parts = data.split(':')
+    command = parts[0]
+    rotulo = rotulo_comando(command)
+    metricas.incrementar("comandos_total", comando=rotulo)
+
+    inicio = time.perf_counter()
+    try:
+        with metricas.trava(game_lock, "game_lock"):
+            _executar(conn, player_id, command, parts)
+    finally:
+        metricas.observar("comando_ms", (time.perf_counter() - inicio) * 1000, comando=rotulo)
+
+def _executar(conn, player_id, command, parts):
+    """Executa um comando do jogador; quem chama já está com o game_lock."""
+    if command == "MOVE":
+        if jogo.current_turn != player_id:
+            responder(conn, "ERRO: Calma lá, ainda não é o seu turno!.")
+            return
+
+        from_pos = tuple(map(int, parts[1].split(',')))
+        to_pos = tuple(map(int, parts[2].split(',')))
+
+        with metricas.medir("validacao_ms"):
+            legal = jogo.is_legal_move(player_id, from_pos, to_pos)
+        if legal:
+            with metricas.medir("move_piece_ms"):
+                jogo.move_piece(player_id, from_pos, to_pos)
+            if diario:
+                diario.registrar(jogo, player_id, from_pos, to_pos)
+            update = f"UPDATE:{from_pos[0]},{from_pos[1]}:{to_pos[0]},{to_pos[1]}"
+
+            if jogo.winner:
+                broadcast(update, f"VENCEDOR:{jogo.winner}")
+            else: # O próximo jogador recebe o UPDATE e o SEU_TURNO na mesma escrita
+                broadcast(update, extra={assento(jogo.current_turn): ("SEU_TURNO",)})
+        else:
+            metricas.incrementar("lances_invalidos_total")
+            responder(conn, "ERRO:Movimento inválido.")
+
+    elif command == "CHAT":
+        message = parts[1]
+        broadcast(f"CHAT:{player_id}:{message}", sender_conn=conn)
+
+    elif command == "DESISTENCIA":
+        winner = 3 - player_id
+        broadcast(f"VENCEDOR:{winner}:DESISTENCIA")
+
+    elif command == "DICA":
+        responder(conn, mensagem_dica(finais, jogo, player_id))
+
+def handle_espectador(conn):
+    """Espectadores só recebem; o que mandarem é ignorado até desconectarem."""
+    try:
+        while conn.recv(4096):
+            pass
+    except OSError:
+        pass
+    with game_lock:
+        espectadores.remove(conn)
+        saidas.pop(conn).fechar()
     conn.close()
-    if len(jogadores) < 2 and not jogo.winner:
-         broadcast("OPONENTE_DESCONECTOU")
-
-def broadcast(message, sender_conn=None):
-    for client_conn in jogadores:
-        if client_conn != sender_conn:
-            try:
-                client_conn.send(message.encode('utf-8'))
-            except Exception as e:
-                print(f"Erro ao transmitir: {e}")
-
-def start_server():
+
+def entrar_espectador(conn):
+    with game_lock:
+        espectadores.append(conn)
+        abrir_saida(conn)
+        responder(conn, "ESPECTADOR:1", mensagem_sync(jogo))
+    handle_espectador(conn)
+
+def retomar(conn, token):
+    """
+    Devolve ao dono do token o seu assento, agora nesta conexão, e manda a foto do jogo
+    (SYNC) em vez de repetir os lances perdidos. Retorna o player_id, ou None se o token
+    não vale.
+    """
+    with game_lock:
+        player_id = sessoes.get(token)
+        if player_id is None:
+            return None
+        antigo = assento(player_id)
+        if antigo is not None:
+            # A conexão antiga ainda não tinha caído (meia-aberta): perde o assento e é fechada
+            jogadores.remove(antigo)
+            player_map.pop(antigo, None)
+            saidas[antigo].fechar()
+        jogadores.append(conn)
+        player_map[conn] = player_id
+        abrir_saida(conn)
+        mensagens = [f"BEMVINDO:{player_id}:{token}", mensagem_sync(jogo)]
+        if len(jogadores) == 2 and not jogo.winner and jogo.current_turn == player_id:
+            mensagens.append("SEU_TURNO")
+        responder(conn, *mensagens)
+        broadcast(f"OPONENTE_RECONECTOU:{player_id}", mensagem_sync(jogo), sender_conn=conn)
+    return player_id
+
+def handle_retorno(conn):
+    """
+    Porta PORT + 1: a primeira mensagem é RETOMAR:<token> (jogador voltando) ou
+    ASSISTIR:<sala> (espectador). Qualquer outra coisa encerra a conexão.
+    """
+    decodificador = Decodificador()
+    try:
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                break
+            messages = decodificador.alimentar(data)
+            if not messages:
+                continue
+            parts = messages[0].split(':')
+            if parts[0] == "RETOMAR":
+                player_id = retomar(conn, parts[1])
+                if player_id is not None:
+                    # O resto do que já chegou segue pelo caminho normal do jogador
+                    for message in messages[1:]:
+                        processar_mensagem(conn, player_id, message)
+                    handle_jogador(conn, player_id, decodificador)
+                    return
+                enviar(conn, "ERRO:Sessão inválida.")
+            elif parts[0] == "ASSISTIR":
+                entrar_espectador(conn)
+                return
+            break
+    except (OSError, IndexError, ValueError):
+        pass
+    conn.close()
+
+def escutar_retorno():
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.bind((HOST, PORT + 1))
+    server_socket.listen(16)
+    log.info("Retorno de jogadores e espectadores em %s:%d", HOST, PORT + 1)
+    while True:
+        conn, addr = server_socket.accept()
+        threading.Thread(target=handle_retorno, args=(conn,), daemon=True).start()
+
+def assento(player_id):
+    for conn in jogadores:
+        if player_map.get(conn) == player_id:
+            return conn
+    return None
+
+def foto_atual():
+    return codificar(mensagem_sync(jogo))
+
+def abrir_saida(conn):
+    saidas[conn] = FilaDeSaida(conn, foto=foto_atual)
+
+def responder(conn, *messages):
+    saida = saidas.get(conn)
+    if saida:
+        saida.colocar(codificar_lote(messages))
+
+def broadcast(*messages, sender_conn=None, extra=None):
+    """Coloca as mensagens na fila de envio de todos (jogadores e espectadores), menos do
+    remetente. Nunca bloqueia: quem escreve no socket é a thread de cada conexão.
+    `extra` permite acrescentar mensagens só para algumas conexões no mesmo envio."""
+    with metricas.medir("broadcast_ms"):
+        dados = codificar_lote(messages)  # codifica uma vez só para todo mundo
+        for client_conn in jogadores + espectadores:
+            if client_conn != sender_conn:
+                saida = saidas.get(client_conn)
+                if saida is None:
+                    continue
+                if extra and client_conn in extra:
+                    saida.colocar(dados + codificar_lote(extra[client_conn]))
+                else:
+                    saida.colocar(dados)
+
+class ConexaoBot:
+    """
+    Ocupa um assento no lugar de um socket. Recebe as mensagens como se fosse um jogador e,
+    quando chega o SEU_TURNO, pensa numa cópia do jogo (fora do game_lock) e manda o MOVE
+    pelo mesmo caminho dos jogadores humanos.
+    """
+    def __init__(self, player_id, tempo_ms=300):
+        self.player_id = player_id
+        self.motor = Motor(tempo_ms=tempo_ms, finais=finais)
+        self.decodificador = Decodificador()
+
+    def getpeername(self):
+        return ("bot", self.player_id)
+
+    def sendall(self, data):
+        for message in self.decodificador.alimentar(data):
+            if message == "SEU_TURNO":
+                threading.Thread(target=self._jogar, daemon=True).start()
+
+    def shutdown(self, how):
+        pass
+
+    def close(self):
+        pass
+
+    def _jogar(self):
+        with game_lock:
+            copia = jogo.clone()
+        movimento = self.motor.escolher_movimento(copia, self.player_id)
+        if movimento:
+            (from_r, from_c), (to_r, to_c) = movimento
+            processar_mensagem(self, self.player_id, f"MOVE:{from_r},{from_c}:{to_r},{to_c}")
+
+def start_server(com_bot=False, tempo_bot_ms=300, base_diario=None, arquivo_finais=None):
+    global jogo, diario, finais
+    if arquivo_finais:
+        finais = TabelaFinais(arquivo_finais)
+    if base_diario:
+        # Se já existe um diário com esse nome, a partida continua de onde parou
+        if os.path.exists(base_diario + ".mov"):
+            jogo = diario_de_partida.restaurar(base_diario)
+            log.info("Partida restaurada de %s (vez do jogador %d)", base_diario, jogo.current_turn)
+        diario = diario_de_partida.Diario(base_diario, jogo.board_size)
+
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_socket.bind((HOST, PORT))
     server_socket.listen(2)
-    print(f"[ESCUTANDO] Servidor em {HOST}:{PORT}")
+    log.info("Servidor escutando em %s:%d", HOST, PORT)
+
+    threading.Thread(target=escutar_retorno, daemon=True).start()
 
     player_id_counter = 1
     while True:
         conn, addr = server_socket.accept()
-        if len(jogadores) < 2:
-            jogadores.append(conn)
-            player_map[conn] = player_id_counter
-            
+        # Os dois assentos são distribuídos uma vez; depois disso só se volta com o token
+        if player_id_counter <= 2:
+            token = secrets.token_hex(8)
+            with game_lock:
+                jogadores.append(conn)
+                player_map[conn] = player_id_counter
+                sessoes[token] = player_id_counter
+                abrir_saida(conn)
+                mensagens = [f"BEMVINDO:{player_id_counter}:{token}"]
+                if jogo.move_number:
+                    mensagens.append(mensagem_sync(jogo))  # partida restaurada do diário
+                responder(conn, *mensagens)
+
             thread = threading.Thread(target=handle_jogador, args=(conn, player_id_counter))
             thread.start()
-            
-            conn.send(f"BEMVINDO:{player_id_counter}".encode('utf-8'))
             player_id_counter += 1
 
-            if len(jogadores) == 2:
-                print("Ambos os jogadores conectados. Iniciando o jogo.")
-                broadcast("INICIAR_JOGO")
-                # Envia o comando de turno para o primeiro jogador
-                jogadores[0].send("SEU_TURNO".encode('utf-8'))
+            if com_bot and player_id_counter == 2:
+                # O motor fica com o assento do jogador 2
+                bot = ConexaoBot(player_id_counter, tempo_bot_ms)
+                with game_lock:
+                    jogadores.append(bot)
+                    player_map[bot] = player_id_counter
+                    abrir_saida(bot)
+                player_id_counter += 1
+
+            if player_id_counter == 3:
+                log.info("Ambos os jogadores conectados. Iniciando o jogo.")
+                # Envia o comando de turno para o primeiro jogador junto com o início
+                with game_lock:
+                    broadcast("INICIAR_JOGO", extra={assento(jogo.current_turn): ("SEU_TURNO",)})
         else:
-            conn.send("Poxa, a sala está cheia.".encode('utf-8'))
-            conn.close()
+            # Sala cheia: a conexão assiste à partida, começando por uma foto do estado atual
+            threading.Thread(target=entrar_espectador, args=(conn,), daemon=True).start()
 
 if __name__ == "__main__":
-    start_server()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Servidor do Halma.")
+    parser.add_argument("--salas", action="store_true", help="modo asyncio com várias salas")
+    parser.add_argument("--porta", type=int, default=PORT, help="porta dos jogadores (a seguinte é a de retorno)")
+    parser.add_argument("--bot", action="store_true", help="o motor joga como jogador 2")
+    parser.add_argument("--tempo-bot-ms", type=int, default=300, help="orçamento do motor por lance")
+    parser.add_argument("--diario", help="caminho base do diário da partida (modo salas: uma pasta)")
+    parser.add_argument("--finais", help="tabela de finais para o bot e para as dicas (python finais.py gerar ...)")
+    parser.add_argument("--metricas-porta", type=int, default=PORTA_METRICAS,
+                        help="porta do endpoint de métricas em localhost (0 desliga)")
+    parser.add_argument("--log", default="INFO", help="nível do log (DEBUG, INFO, WARNING...)")
+    parser.add_argument("--log-amostra", type=int, default=100,
+                        help="em DEBUG, registra só uma a cada N mensagens recebidas")
+    args = parser.parse_args()
+
+    configurar_log(args.log)
+    PORT = args.porta
+    log_mensagens.taxa = max(1, args.log_amostra)
+    if args.metricas_porta:
+        iniciar_endpoint(args.metricas_porta)
+        log.info("Métricas em http://127.0.0.1:%d/metrics", args.metricas_porta)
+
+    if args.salas:
+        # Modo com várias salas (asyncio), uma partida por par de conexões
+        import asyncio
+        import salas
+        salas.log_mensagens.taxa = log_mensagens.taxa
+        asyncio.run(salas.iniciar_servidor_salas(HOST, PORT, pasta_diarios=args.diario,
+                                                 arquivo_finais=args.finais))
+    else:
+        start_server(com_bot=args.bot, tempo_bot_ms=args.tempo_bot_ms, base_diario=args.diario,
+                     arquivo_finais=args.finais)
\ No newline at end of file
@@ -0,0 +1,152 @@
+# simulacao.py
+"""
+Partidas em lote, sem interface e sem servidor, para balanceamento e testes de regressão.
+Cada partida roda em um processo do pool; a tarefa é só uma tupla pequena (semente,
+políticas, limites) e o resultado volta compacto: vencedor, número de lances e os lances
+empacotados em bytes (2 bytes por lance: índice de origem e de destino).
+
+Uso: python simulacao.py --partidas 1000 --p1 gulosa --p2 aleatoria
+"""
+import argparse
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from tabuleiro import HalmaGame, alcance, indices
+
+
+def _movimentos(jogo, player):
+    """Lances do jogador como pares de índices (origem, destino)."""
+    geo = jogo.geo
+    ocupadas = jogo.occupied()
+    movimentos = []
+    for origem in indices(jogo.pecas[player]):
+        for destino in indices(alcance(geo, ocupadas & ~(1 << origem), origem)):
+            movimentos.append((origem, destino))
+    return movimentos
+
+
+def politica_aleatoria(jogo, player, rng):
+    movimentos = _movimentos(jogo, player)
+    return rng.choice(movimentos) if movimentos else None
+
+
+def politica_gulosa(jogo, player, rng):
+    """O lance que mais aproxima uma peça do canto da meta (empates sorteados)."""
+    n = jogo.board_size
+    if player == 1:
+        distancia = lambda i: (n - 1 - i // n) + (n - 1 - i % n)
+    else:
+        distancia = lambda i: i // n + i % n
+    melhores = []
+    melhor_ganho = None
+    for origem, destino in _movimentos(jogo, player):
+        ganho = distancia(origem) - distancia(destino)
+        if melhor_ganho is None or ganho > melhor_ganho:
+            melhor_ganho = ganho
+            melhores = [(origem, destino)]
+        elif ganho == melhor_ganho:
+            melhores.append((origem, destino))
+    return rng.choice(melhores) if melhores else None
+
+
+_MOTORES = {}
+
+
+def politica_busca(jogo, player, rng, tempo_ms=20):
+    # Um motor por processo (e por orçamento), para reaproveitar a tabela de transposição
+    from motor import Motor
+    motor = _MOTORES.get(tempo_ms)
+    if motor is None:
+        motor = _MOTORES[tempo_ms] = Motor(tempo_ms=tempo_ms, bits_tt=16)
+    movimento = motor.escolher_movimento(jogo, player)
+    if movimento is None:
+        return None
+    n = jogo.board_size
+    (from_r, from_c), (to_r, to_c) = movimento
+    return from_r * n + from_c, to_r * n + to_c
+
+
+POLITICAS = {
+    "aleatoria": politica_aleatoria,
+    "gulosa": politica_gulosa,
+    "busca": politica_busca,
+}
+
+
+def jogar_partida(tarefa):
+    """Joga uma partida inteira e devolve (vencedor, lances, bytes dos lances). Vencedor 0 = sem vencedor."""
+    semente, p1, p2, max_lances, board_size, tempo_ms = tarefa
+    rng = random.Random(semente)
+    jogo = HalmaGame(board_size)
+    politicas = (None, POLITICAS[p1], POLITICAS[p2])
+    posicoes = jogo.geo.posicoes
+    lances = bytearray()
+
+    while not jogo.winner and len(lances) < 2 * max_lances:
+        player = jogo.current_turn
+        politica = politicas[player]
+        if politica is politica_busca:
+            movimento = politica(jogo, player, rng, tempo_ms)
+        else:
+            movimento = politica(jogo, player, rng)
+        if movimento is None:
+            break
+        origem, destino = movimento
+        jogo.move_piece(player, posicoes[origem], posicoes[destino])
+        lances.append(origem)
+        lances.append(destino)
+
+    return jogo.winner or 0, len(lances) // 2, bytes(lances)
+
+
+def simular(partidas, p1="gulosa", p2="gulosa", processos=None, max_lances=400,
+            board_size=10, tempo_ms=20, semente=0):
+    """Roda as partidas no pool e devolve (lista de resultados, segundos gastos)."""
+    processos = processos or os.cpu_count() or 1
+    tarefas = [(semente + i, p1, p2, max_lances, board_size, tempo_ms) for i in range(partidas)]
+    # Lotes grandes por tarefa para o custo de comunicação entre processos não aparecer
+    chunksize = max(1, partidas // (processos * 4))
+    inicio = time.perf_counter()
+    if processos == 1:
+        resultados = list(map(jogar_partida, tarefas))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            resultados = list(pool.map(jogar_partida, tarefas, chunksize=chunksize))
+    return resultados, time.perf_counter() - inicio
+
+
+def salvar_resultados(caminho, resultados):
+    """Grava os resultados em binário: por partida, <vencedor u8><lances u16> e os bytes dos lances."""
+    cabecalho = struct.Struct('<BH')
+    with open(caminho, 'wb') as arquivo:
+        for vencedor, total_lances, lances in resultados:
+            arquivo.write(cabecalho.pack(vencedor, total_lances))
+            arquivo.write(lances)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simula partidas de Halma em lote.")
+    parser.add_argument("--partidas", type=int, default=100)
+    parser.add_argument("--p1", choices=POLITICAS, default="gulosa")
+    parser.add_argument("--p2", choices=POLITICAS, default="gulosa")
+    parser.add_argument("--processos", type=int, default=None, help="padrão: número de núcleos")
+    parser.add_argument("--max-lances", type=int, default=400)
+    parser.add_argument("--tamanho", type=int, default=10)
+    parser.add_argument("--tempo-ms", type=int, default=20, help="orçamento da política 'busca'")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="arquivo binário para gravar as partidas")
+    args = parser.parse_args()
+
+    resultados, segundos = simular(args.partidas, args.p1, args.p2, args.processos,
+                                   args.max_lances, args.tamanho, args.tempo_ms, args.semente)
+    total_lances = sum(lances for _, lances, _ in resultados)
+    vitorias = [sum(1 for vencedor, _, _ in resultados if vencedor == p) for p in (0, 1, 2)]
+
+    print(f"{len(resultados)} partidas em {segundos:.2f}s")
+    print(f"  {len(resultados) / segundos:.1f} partidas/s, {total_lances / segundos:.0f} lances/s")
+    print(f"  Jogador 1: {vitorias[1]}  Jogador 2: {vitorias[2]}  Sem vencedor: {vitorias[0]}")
+    if args.saida:
+        salvar_resultados(args.saida, resultados)
+        print(f"  Partidas gravadas em {args.saida}")
@@ -1,65 +1,361 @@
 # tabuleiro.py
 """
 Aqui é definido as regras e estado do jogo. Tabuleiro, tamanho dele, etc.
+
+O estado fica em bitboards: um inteiro por jogador, onde o bit r * board_size + c diz se
+a casa (r, c) tem uma peça daquele jogador. A lista de listas continua disponível como
+uma "vista" em `board`/`get_board()`.
 """
+
+# Peças do Jogador 1 (canto superior esquerdo). As do Jogador 2 são o espelho delas.
+POSICOES_INICIAIS = [
+    (0, 0), (1, 0), (2, 0), (3, 0),
+    (0, 1), (1, 1), (2, 1),
+    (0, 2), (1, 2),
+    (0, 3)
+]
+
+DIRECOES = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+class Geometria:
+    """Máscaras pré-calculadas para um tamanho de tabuleiro (criadas uma vez por tamanho)."""
+    __slots__ = ("board_size", "cheio", "passos", "saltos", "casa_inicial", "meta",
+                 "tamanho_meta", "posicoes", "vizinhos", "saltos_de")
+
+    def __init__(self, board_size):
+        n = board_size
+        self.board_size = n
+        self.cheio = (1 << (n * n)) - 1
+
+        # Para cada direção: (deslocamento, máscara das casas de onde dá para andar 1 ou 2 casas)
+        self.passos = []
+        self.saltos = []
+        for dr, dc in DIRECOES:
+            for distancia, destino in ((1, self.passos), (2, self.saltos)):
+                origem = 0
+                for r in range(n):
+                    for c in range(n):
+                        if 0 <= r + dr * distancia < n and 0 <= c + dc * distancia < n:
+                            origem |= 1 << (r * n + c)
+                destino.append(((dr * n + dc) * distancia, origem))
+
+        # casa_inicial[p] é a zona de partida do jogador p (e o objetivo do adversário)
+        p1 = 0
+        p2 = 0
+        for r, c in POSICOES_INICIAIS:
+            p1 |= 1 << (r * n + c)
+            p2 |= 1 << ((n - 1 - r) * n + (n - 1 - c))
+        self.casa_inicial = (0, p1, p2)
+        # meta[p] é a zona de vitória do jogador p
+        self.meta = (0, p2, p1)
+        self.tamanho_meta = len(POSICOES_INICIAIS)
+
+        # Tabelas por casa para a busca de movimentos:
+        # vizinhos[i] = bits das casas a um passo de i
+        # saltos_de[i] = (bit da casa pulada, bit do destino, índice do destino) para cada salto
+        self.posicoes = [(i // n, i % n) for i in range(n * n)]
+        self.vizinhos = []
+        self.saltos_de = []
+        for r, c in self.posicoes:
+            vizinhos = []
+            saltos = []
+            for dr, dc in DIRECOES:
+                if 0 <= r + dr < n and 0 <= c + dc < n:
+                    vizinhos.append(1 << ((r + dr) * n + c + dc))
+                    if 0 <= r + 2 * dr < n and 0 <= c + 2 * dc < n:
+                        destino = (r + 2 * dr) * n + c + 2 * dc
+                        saltos.append((1 << ((r + dr) * n + c + dc), 1 << destino, destino))
+            self.vizinhos.append(tuple(vizinhos))
+            self.saltos_de.append(tuple(saltos))
+
+
+_GEOMETRIAS = {}
+
+
+def geometria(board_size):
+    geo = _GEOMETRIAS.get(board_size)
+    if geo is None:
+        geo = _GEOMETRIAS[board_size] = Geometria(board_size)
+    return geo
+
+
+def deslocar(mascara, deslocamento):
+    return mascara << deslocamento if deslocamento >= 0 else mascara >> -deslocamento
+
+
+def alcance(geo, ocupadas, origem):
+    """
+    Bitmask de todos os destinos da peça na casa `origem`: passos simples mais qualquer
+    sequência de saltos. `ocupadas` não deve incluir a própria peça que está andando.
+    Uma BFS só, com um bitmap de visitadas, em vez de enumerar caminhos.
+    """
+    destinos = 0
+    for bit in geo.vizinhos[origem]:
+        if not ocupadas & bit:
+            destinos |= bit
+
+    visitadas = 1 << origem
+    fila = [origem]
+    saltos_de = geo.saltos_de
+    for atual in fila:  # a fila cresce enquanto é percorrida
+        for meio, destino, indice in saltos_de[atual]:
+            if ocupadas & meio and not (ocupadas | visitadas) & destino:
+                visitadas |= destino
+                fila.append(indice)
+
+    return (destinos | visitadas) & ~(1 << origem)
+
+
+def alcance_rastreado(geo, ocupadas, origem):
+    """
+    Igual a `alcance`, mas devolve também a máscara de todas as casas consultadas na busca.
+    O resultado só muda se alguma dessas casas mudar, o que permite guardá-lo em cache.
+    """
+    destinos = 0
+    consultadas = 0
+    for bit in geo.vizinhos[origem]:
+        consultadas |= bit
+        if not ocupadas & bit:
+            destinos |= bit
+
+    visitadas = 1 << origem
+    fila = [origem]
+    saltos_de = geo.saltos_de
+    for atual in fila:
+        for meio, destino, indice in saltos_de[atual]:
+            consultadas |= meio | destino
+            if ocupadas & meio and not (ocupadas | visitadas) & destino:
+                visitadas |= destino
+                fila.append(indice)
+
+    return (destinos | visitadas) & ~(1 << origem), consultadas
+
+
+def indices(mascara):
+    """Índices dos bits ligados em `mascara`, do menor para o maior."""
+    while mascara:
+        bit = mascara & -mascara
+        yield bit.bit_length() - 1
+        mascara ^= bit
+
+
+class _LinhaTabuleiro:
+    """Uma linha da vista em lista; lê e escreve direto nos bitboards."""
+    __slots__ = ("_jogo", "_r")
+
+    def __init__(self, jogo, r):
+        self._jogo = jogo
+        self._r = r
+
+    def _coluna(self, c):
+        n = self._jogo.board_size
+        if c < 0:
+            c += n
+        if not 0 <= c < n:
+            raise IndexError("coluna fora do tabuleiro")
+        return c
+
+    def __getitem__(self, c):
+        return self._jogo.piece_at((self._r, self._coluna(c)))
+
+    def __setitem__(self, c, player):
+        self._jogo.set_piece((self._r, self._coluna(c)), player)
+
+    def __len__(self):
+        return self._jogo.board_size
+
+    def __iter__(self):
+        for c in range(self._jogo.board_size):
+            yield self._jogo.piece_at((self._r, c))
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class VistaTabuleiro:
+    """Vista de lista de listas sobre os bitboards: vista[r][c] -> 0, 1 ou 2."""
+    __slots__ = ("_jogo",)
+
+    def __init__(self, jogo):
+        self._jogo = jogo
+
+    def __getitem__(self, r):
+        n = self._jogo.board_size
+        if r < 0:
+            r += n
+        if not 0 <= r < n:
+            raise IndexError("linha fora do tabuleiro")
+        return _LinhaTabuleiro(self._jogo, r)
+
+    def __len__(self):
+        return self._jogo.board_size
+
+    def __iter__(self):
+        for r in range(self._jogo.board_size):
+            yield _LinhaTabuleiro(self._jogo, r)
+
+    def __eq__(self, other):
+        return self.to_list() == [list(linha) for linha in other]
+
+    def to_list(self):
+        return [list(linha) for linha in self]
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+
 class HalmaGame:
     def __init__(self, board_size=10):
         self.board_size = board_size
-        self.board = [[0] * board_size for _ in range(board_size)]
+        self.geo = geometria(board_size)
+        self.pecas = [0, 0, 0]  # bitboard de cada jogador (o índice 0 não é usado)
+        self.na_meta = [0, 0, 0]  # quantas peças de cada jogador já estão na zona de vitória
         self.current_turn = 1  # o jogador 1 sempre começa(eu poderia botar um dado ou moeda para ver quem começa?)
         self.winner = None
+        self.move_number = 0  # quantos lances já foram jogados
         self._setup_pieces()
 
+    @property
+    def board(self):
+        return VistaTabuleiro(self)
+
     def _setup_pieces(self):
         """Posiciona as peças iniciais para os dois jogadores."""
-        # Peças do Jogador 1 (canto superior esquerdo) 
-        # Embora, pudesse ser em um canto aleatório
-        initial_positions_p1 = [
-            (0, 0), (1, 0), (2, 0), (3, 0),
-            (0, 1), (1, 1), (2, 1),
-            (0, 2), (1, 2),
-            (0, 3)
-        ]
-
-        #Para cada posição da matriz é adicionado um valor(1 ou 2) para saber qual peça é de qual jogador
-        for r, c in initial_positions_p1:
-            self.board[r][c] = 1
-
-        # Peças do Jogador 2 (canto inferior direito)
-        # Função para dispor as peças baseado nas peças do primeiro jogador usando espelhamento
-        for r, c in initial_positions_p1:
-            self.board[self.board_size - 1 - r][self.board_size - 1 - c] = 2
+        # Jogador 1 no canto superior esquerdo e Jogador 2 no espelho, no canto inferior direito
+        self.pecas[1] = self.geo.casa_inicial[1]
+        self.pecas[2] = self.geo.casa_inicial[2]
+        self._recontar_meta()
+
+    def restore_state(self, pecas1, pecas2, current_turn, winner=None, move_number=0):
+        """Carrega um estado salvo (bitboards, vez, vencedor e nº do lance), como os do diário."""
+        self.pecas[1] = pecas1
+        self.pecas[2] = pecas2
+        self.current_turn = current_turn
+        self.winner = winner
+        self.move_number = move_number
+        self._recontar_meta()
+
+    def _recontar_meta(self):
+        meta = self.geo.meta
+        self.na_meta[1] = (self.pecas[1] & meta[1]).bit_count()
+        self.na_meta[2] = (self.pecas[2] & meta[2]).bit_count()
 
     def get_board(self):
         return self.board
 
+    def clone(self):
+        """Cópia independente do jogo (só alguns inteiros, barata de fazer)."""
+        copia = HalmaGame.__new__(HalmaGame)
+        copia.board_size = self.board_size
+        copia.geo = self.geo
+        copia.pecas = list(self.pecas)
+        copia.na_meta = list(self.na_meta)
+        copia.current_turn = self.current_turn
+        copia.winner = self.winner
+        copia.move_number = self.move_number
+        return copia
+
+    def _bit(self, pos):
+        r, c = pos
+        return 1 << (r * self.board_size + c)
+
+    def _dentro(self, pos):
+        r, c = pos
+        return 0 <= r < self.board_size and 0 <= c < self.board_size
+
+    def piece_at(self, pos):
+        bit = self._bit(pos)
+        if self.pecas[1] & bit:
+            return 1
+        if self.pecas[2] & bit:
+            return 2
+        return 0
+
+    def set_piece(self, pos, player):
+        """Coloca (ou tira, com player=0) uma peça em uma casa."""
+        bit = self._bit(pos)
+        self.pecas[1] &= ~bit
+        self.pecas[2] &= ~bit
+        if player:
+            self.pecas[player] |= bit
+        self._recontar_meta()
+
+    def occupied(self):
+        return self.pecas[1] | self.pecas[2]
+
+    def adjacent_steps(self, pos):
+        """Bitmask das casas vazias a um passo de `pos`."""
+        origem = self._bit(pos)
+        livres = ~self.occupied() & self.geo.cheio
+        destinos = 0
+        for deslocamento, mascara in self.geo.passos:
+            if origem & mascara:
+                destinos |= deslocar(origem, deslocamento)
+        return destinos & livres
+
+    def single_jumps(self, pos):
+        """Bitmask das casas vazias alcançáveis com um único salto a partir de `pos`."""
+        origem = self._bit(pos)
+        ocupadas = self.occupied()
+        livres = ~ocupadas & self.geo.cheio
+        destinos = 0
+        for (meio, _), (deslocamento, mascara) in zip(self.geo.passos, self.geo.saltos):
+            if origem & mascara and deslocar(origem, meio) & ocupadas:
+                destinos |= deslocar(origem, deslocamento)
+        return destinos & livres
+
+    def reachable_mask(self, pos):
+        """Bitmask de todas as casas para onde a peça em `pos` pode ir neste lance."""
+        origem = pos[0] * self.board_size + pos[1]
+        return alcance(self.geo, self.occupied() & ~(1 << origem), origem)
+
+    def reachable_from(self, pos):
+        """Conjunto de casas (r, c) alcançáveis pela peça em `pos`, incluindo saltos encadeados."""
+        posicoes = self.geo.posicoes
+        return {posicoes[i] for i in indices(self.reachable_mask(pos))}
+
+    def generate_moves(self, player):
+        """Lista de todos os movimentos (from_pos, to_pos) do jogador."""
+        geo = self.geo
+        posicoes = geo.posicoes
+        ocupadas = self.occupied()
+        moves = []
+        for origem in indices(self.pecas[player]):
+            destinos = alcance(geo, ocupadas & ~(1 << origem), origem)
+            from_pos = posicoes[origem]
+            moves.extend((from_pos, posicoes[i]) for i in indices(destinos))
+        return moves
+
+    def is_legal_move(self, player, from_pos, to_pos):
+        """Validação completa de um lance (passo ou cadeia de saltos), usada pelo servidor."""
+        if not (self._dentro(from_pos) and self._dentro(to_pos)):
+            return False
+        if not self.pecas[player] & self._bit(from_pos):
+            return False  # Não é sua peça
+        return bool(self.reachable_mask(from_pos) & self._bit(to_pos))
+
     def is_valid_move(self, player, from_pos, to_pos, path):
         """Verifica se um movimento é válido (adjacente ou salto)."""
-        from_r, from_c = from_pos
-        to_r, to_c = to_pos
-
         # Validações básicas
-        if not (0 <= to_r < self.board_size and 0 <= to_c < self.board_size):
+        if not (self._dentro(from_pos) and self._dentro(to_pos)):
             return False  # Fora do tabuleiro
-        if self.board[to_r][to_c] != 0:
+        if self.occupied() & self._bit(to_pos):
             return False  # Célula de destino não está vazia
-        if self.board[from_r][from_c] != player:
+        if not self.pecas[player] & self._bit(from_pos):
             return False  # Não é sua peça
 
         # Movimento adjacente (só permitido se for o primeiro passo)
-        is_adjacent = abs(from_r - to_r) <= 1 and abs(from_c - to_c) <= 1
-        if is_adjacent and not path:
+        if not path and self.adjacent_steps(from_pos) & self._bit(to_pos):
             return True
 
         # Movimento de salto
-        jump_r = from_r + (to_r - from_r) // 2
-        jump_c = from_c + (to_c - from_c) // 2
-
-        is_jump = abs(from_r - to_r) in [0, 2] and abs(from_c - to_c) in [0, 2]
-        if is_jump and self.board[jump_r][jump_c] != 0:
-             # Não pode saltar sobre uma casa já visitada no mesmo movimento
-            if to_pos not in path:
-                return True
+        # Não pode saltar sobre uma casa já visitada no mesmo movimento
+        if self.single_jumps(from_pos) & self._bit(to_pos):
+            return to_pos not in path
 
         return False
 
@@ -71,48 +367,30 @@ class HalmaGame:
         if self.current_turn != player:
             return False, "Não é o seu turno."
 
-        from_r, from_c = from_pos
-        to_r, to_c = to_pos
-        self.board[to_r][to_c] = player
-        self.board[from_r][from_c] = 0
+        from_bit = self._bit(from_pos)
+        to_bit = self._bit(to_pos)
+        self.pecas[player] ^= from_bit | to_bit
+        self.move_number += 1
+
+        # Mantém a contagem de peças na zona de vitória sem varrer a zona inteira
+        meta = self.geo.meta[player]
+        if meta & from_bit:
+            self.na_meta[player] -= 1
+        if meta & to_bit:
+            self.na_meta[player] += 1
 
         self.check_win_condition()
         if not self.winner:
             self.current_turn = 3 - player  # Alterna entre 1 e 2
-        
+
         return True, "Movimento realizado."
 
     def check_win_condition(self):
         """Verifica se algum jogador venceu."""
-        # Zona de vitória do jogador 1 (canto inferior direito)
-        p1_wins = True
-        destination_p1 = [
-            (self.board_size - 1 - r, self.board_size - 1 - c)
-            for r, c in [
-                (0, 0), (1, 0), (2, 0), (3, 0),
-                (0, 1), (1, 1), (2, 1),
-                (0, 2), (1, 2),
-                (0, 3)
-            ]
-        ]
-        for r, c in destination_p1:
-            if self.board[r][c] != 1:
-                p1_wins = False
-                break
-        if p1_wins:
+        # Zona de vitória do jogador 1 é a casa inicial do jogador 2, e vice-versa.
+        # Como na_meta é atualizado a cada lance, basta comparar com o tamanho da zona.
+        if self.na_meta[1] == self.geo.tamanho_meta:
             self.winner = 1
 
-        # Zona de vitória do jogador 2 (canto superior esquerdo)
-        p2_wins = True
-        destination_p2 = [
-            (0, 0), (1, 0), (2, 0), (3, 0),
-            (0, 1), (1, 1), (2, 1),
-            (0, 2), (1, 2),
-            (0, 3)
-        ]
-        for r, c in destination_p2:
-            if self.board[r][c] != 2:
-                p2_wins = False
-                break
-        if p2_wins:
-            self.winner = 2
\ No newline at end of file
+        if self.na_meta[2] == self.geo.tamanho_meta:
+            self.winner = 2